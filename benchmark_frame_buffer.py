@@ -0,0 +1,71 @@
+# benchmark_frame_buffer.py - сравнение сборки кадра: склейка строк против FrameBuffer
+import argparse
+import random
+import time
+from config import *
+from frame_buffer import FrameBuffer
+from raycasting import RayCaster
+
+
+def format_by_concatenation(columns):
+    """Прежняя сборка кадра: каждая колонка дважды, транспонирование через line +="""
+    frame = []
+    for column in columns:
+        frame.append(column)
+        frame.append(column)
+    output_lines = []
+    for row in range(len(frame[0])):
+        line = ""
+        for col in range(len(frame)):
+            if row < len(frame[col]):
+                line += frame[col][row]
+            else:
+                line += " "
+        output_lines.append(line)
+    return "\n".join(output_lines)
+
+
+def format_by_buffer(buffer, columns):
+    """Сборка через FrameBuffer: колонка пишется срезом, сразу в двух экземплярах"""
+    for col, column in enumerate(columns):
+        buffer.write_column(col * 2, column, repeat=2)
+    return buffer.to_string()
+
+
+def frames_per_second(function, frames):
+    started = time.perf_counter()
+    for _ in range(frames):
+        function()
+    return frames / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарк сборки кадра")
+    parser.add_argument("--frames", type=int, default=500, help="кадров на замер")
+    parser.add_argument("--width", type=int, default=CONSOLE_WIDTH, help="ширина кадра в символах")
+    parser.add_argument("--height", type=int, default=CONSOLE_HEIGHT, help="высота кадра")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Набор настоящих колонок рендерера со случайными высотами и символами
+    raycaster = RayCaster(args.width, args.height)
+    raycaster._ensure_render_cache()
+    rng = random.Random(args.seed)
+    keys = list(raycaster._columns)
+    encoded = [raycaster._columns[rng.choice(keys)] for _ in range(args.width // 2)]
+    text = [column.decode() for column in encoded]
+
+    buffer = FrameBuffer(len(encoded) * 2, args.height)
+    if format_by_buffer(buffer, encoded) != format_by_concatenation(text):
+        raise AssertionError("Кадры, собранные двумя способами, различаются")
+
+    print(f"Кадр {len(encoded) * 2}x{args.height}, {args.frames} кадров")
+    old = frames_per_second(lambda: format_by_concatenation(text), args.frames)
+    new = frames_per_second(lambda: format_by_buffer(buffer, encoded), args.frames)
+    print(f"  склейка строк: {old:10.0f} кадров/с ({1000 / old:.3f} мс)")
+    print(f"  FrameBuffer:   {new:10.0f} кадров/с ({1000 / new:.3f} мс)")
+    print(f"  ускорение:     {new / old:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
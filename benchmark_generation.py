@@ -0,0 +1,183 @@
+# benchmark_generation.py - замер скорости генерации для всех уровней сложности
+import argparse
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from config import *
+from maze_algorithms import ALGORITHMS
+from maze_generator import MazeGenerator, maze_numpy
+from maze_world import ChunkedMazeGenerator
+
+# Варианты генератора: название -> параметры MazeGenerator
+VARIANTS = {
+    "python": {},
+    "compact": {"compact": True},
+    "numpy": {"compact": True, "backend": "numpy"},
+    "guaranteed": {"compact": True, "guarantee_solvable": True},
+}
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу (для небольшого числа запусков)"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def git_revision():
+    """Текущий коммит, чтобы результаты разных версий можно было сравнить"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_generator(settings, variant, algorithm, seed):
+    if settings.get("chunked"):
+        return ChunkedMazeGenerator(settings["width"], settings["height"], seed=seed, verbose=False)
+    return MazeGenerator(settings["width"], settings["height"], settings["room_size"],
+                         seed=seed, verbose=False, algorithm=algorithm, **VARIANTS[variant])
+
+
+def run_once(settings, variant, algorithm, seed, trace_memory=False):
+    """Одна генерация; возвращает (время, попытки, проходим ли, пик памяти, фазы)"""
+    generator = make_generator(settings, variant, algorithm, seed)
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        solvable = generator.generate_maze()
+    finally:
+        elapsed = time.perf_counter() - started
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    stats = getattr(generator, "stats", None)
+    phases = stats.phases if stats is not None else {}
+    return elapsed, generator.attempts, solvable, peak, phases
+
+
+def benchmark(settings, variant, algorithm, runs, base_seed, memory_runs):
+    """Серия генераций с сидами base_seed, base_seed + 1, ..."""
+    times, attempts, solved = [], [], 0
+    phase_times = {}
+    exit_distances = []
+    for i in range(runs):
+        elapsed, attempt_count, solvable, _, phases = run_once(settings, variant, algorithm,
+                                                               base_seed + i)
+        times.append(elapsed)
+        attempts.append(attempt_count)
+        solved += bool(solvable)
+        for name, record in phases.items():
+            phase_times.setdefault(name, []).append(record["time"])
+        # Длина пути до выхода - грубая мера качества лабиринта
+        if "solvability" in phases:
+            exit_distances.append(phases["solvability"]["counters"].get("exit_distance", 0))
+
+    # Пик памяти меряется отдельными запусками: tracemalloc сильно замедляет генерацию
+    peaks = [run_once(settings, variant, algorithm, base_seed + i, trace_memory=True)[3]
+             for i in range(min(memory_runs, runs))]
+
+    return {
+        "runs": runs,
+        "time_median": statistics.median(times),
+        "time_p95": percentile(times, 0.95),
+        "time_min": min(times),
+        "time_max": max(times),
+        "attempts_mean": statistics.mean(attempts),
+        "attempts_max": max(attempts),
+        "solvable_rate": solved / runs,
+        "peak_memory": max(peaks) if peaks else None,
+        "exit_distance_median": statistics.median(exit_distances) if exit_distances else None,
+        "phases_median": {name: statistics.median(values) for name, values in phase_times.items()},
+    }
+
+
+def compare(previous_path, results):
+    """Печатает изменение медианного времени относительно прошлого запуска"""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    old = {(r["difficulty"], r["variant"], r.get("algorithm")): r for r in previous["results"]}
+    print(f"\nСравнение с {previous_path} (коммит {previous['meta'].get('commit')}):")
+    for result in results:
+        before = old.get((result["difficulty"], result["variant"], result["algorithm"]))
+        if before is None:
+            continue
+        change = result["time_median"] / before["time_median"] - 1 if before["time_median"] else 0.0
+        print(f"  {result['difficulty']:<12} {result['variant']:<11} {result['algorithm']:<12} "
+              f"{before['time_median']:8.3f} -> {result['time_median']:8.3f} с ({change:+.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк генерации лабиринтов")
+    parser.add_argument("--runs", type=int, default=5, help="генераций на каждый вариант")
+    parser.add_argument("--seed", type=int, default=1, help="сид первой генерации")
+    parser.add_argument("--difficulty", action="append", choices=list(DIFFICULTIES),
+                        help="уровень сложности (по умолчанию все)")
+    parser.add_argument("--variant", action="append", choices=list(VARIANTS),
+                        help="вариант генератора (по умолчанию все доступные)")
+    parser.add_argument("--algorithm", action="append", choices=list(ALGORITHMS),
+                        help="алгоритм базового лабиринта (по умолчанию - из DIFFICULTIES)")
+    parser.add_argument("--memory-runs", type=int, default=1,
+                        help="запусков с tracemalloc для пика памяти (0 - не мерить)")
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--compare", help="JSON прошлого запуска для сравнения")
+    args = parser.parse_args()
+
+    difficulties = args.difficulty or list(DIFFICULTIES)
+    variants = args.variant or [name for name in VARIANTS
+                                if name != "numpy" or maze_numpy is not None]
+    if "numpy" in variants and maze_numpy is None:
+        print("NumPy не установлен, вариант numpy пропущен")
+        variants.remove("numpy")
+
+    results = []
+    print(f"{'сложность':<12} {'вариант':<11} {'алгоритм':<12} {'медиана':>8} {'p95':>8} "
+          f"{'попытки':>7} {'проходим':>8} {'память':>9} {'до выхода':>9}")
+    for difficulty in difficulties:
+        settings = DIFFICULTIES[difficulty]
+        # Мир из фрагментов один - варианты генератора к нему не относятся
+        if settings.get("chunked"):
+            runs = [("chunked", "eller")]
+        else:
+            algorithms = args.algorithm or [settings.get("algorithm", "legacy")]
+            runs = [(variant, algorithm) for algorithm in algorithms for variant in variants]
+        for variant, algorithm in runs:
+            result = benchmark(settings, variant, algorithm, args.runs, args.seed, args.memory_runs)
+            result.update(difficulty=difficulty, variant=variant, algorithm=algorithm,
+                          width=settings["width"], height=settings["height"])
+            results.append(result)
+            memory = f"{result['peak_memory'] / 1024 / 1024:.1f} МБ" if result["peak_memory"] else "-"
+            distance = result["exit_distance_median"]
+            print(f"{difficulty:<12} {variant:<11} {algorithm:<12} {result['time_median']:8.3f} "
+                  f"{result['time_p95']:8.3f} {result['attempts_mean']:7.1f} "
+                  f"{result['solvable_rate']:8.0%} {memory:>9} {distance if distance is not None else '-':>9}")
+
+    report = {
+        "meta": {
+            "commit": git_revision(),
+            "date": time.strftime('%Y-%m-%d %H:%M:%S'),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
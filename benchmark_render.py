@@ -0,0 +1,276 @@
+# benchmark_render.py - замер скорости рендера вдоль пути камеры без вывода в терминал
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from config import *
+from benchmark_generation import git_revision, percentile
+from demo_player import DemoPlayer
+from maze_generator import MazeGenerator
+from raycasting import RAYCAST_BACKENDS, RayCaster, raycasting_numpy
+
+# Размеры консоли по умолчанию: обычное окно игры и большое
+DEFAULT_SIZES = ["120x40", "400x120"]
+
+
+class Camera:
+    """Положение камеры в кадре - то, что RayCaster читает у игрока"""
+
+    def __init__(self, x, y, angle):
+        self.x = x
+        self.y = y
+        self.angle = angle
+
+
+def parse_size(text):
+    """'120x40' -> (120, 40)"""
+    try:
+        width, height = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"размер должен быть вида ШИРИНАxВЫСОТА: {text}")
+    if width < 2 or height < 1:
+        raise argparse.ArgumentTypeError(f"слишком маленький размер: {text}")
+    return width, height
+
+
+def load_maze(args, recorded):
+    """Генератор с лабиринтом: из файла .maze или по сложности и сиду"""
+    maze_path = args.maze or (recorded or {}).get("maze")
+    if maze_path and os.path.exists(maze_path):
+        generator = MazeGenerator(compact=True, verbose=False)
+        generator.load_file(maze_path)
+        return generator, os.path.basename(maze_path)
+
+    difficulty = args.difficulty or (recorded or {}).get("difficulty") or "сложная"
+    seed = args.seed if args.seed is not None else (recorded or {}).get("seed", 1)
+    settings = DIFFICULTIES[difficulty]
+    if settings.get("chunked"):
+        raise SystemExit("Мир из фрагментов не поддерживается: выберите другую сложность")
+    # Те же параметры, что в игре: при том же сиде получается тот же лабиринт
+    generator = MazeGenerator(settings["width"], settings["height"], settings["room_size"],
+                              compact=True, guarantee_solvable=True, seed=seed, verbose=False,
+                              algorithm=settings.get("algorithm", "legacy"))
+    if not generator.generate_maze():
+        raise SystemExit(f"Не удалось сгенерировать лабиринт ({difficulty}, сид {seed})")
+    return generator, f"{difficulty}, сид {seed}"
+
+
+def scripted_path(generator):
+    """Путь камеры от старта к выходу: осмотр на месте, затем кратчайший путь.
+
+    Камера идет шагами MOVE_SPEED через центры клеток и на поворотах
+    разворачивается шагами ROTATION_SPEED, как игрок в демо-режиме.
+    """
+    start_x, start_y = generator.start_pos
+    player = DemoPlayer(start_x + 0.5, start_y + 0.5, generator.get_distance_field())
+    # Поиск пути печатает ход работы - бенчмарку он не нужен
+    with contextlib.redirect_stdout(io.StringIO()):
+        found = player.find_path_to_exit(generator.get_maze())
+    if not found:
+        raise SystemExit("Путь до выхода не найден")
+
+    frames = []
+    x, y, angle = player.x, player.y, 0.0
+    # Полный оборот на старте: каждый кадр смотрит в новую сторону
+    for step in range(int(2 * math.pi / ROTATION_SPEED)):
+        frames.append((x, y, step * ROTATION_SPEED))
+
+    for cell_x, cell_y in player.path[1:]:
+        target_x, target_y = cell_x + 0.5, cell_y + 0.5
+        target = math.atan2(target_y - y, target_x - x) % (2 * math.pi)
+        turn = (target - angle + math.pi) % (2 * math.pi) - math.pi
+        for _ in range(int(abs(turn) / ROTATION_SPEED)):
+            angle = (angle + math.copysign(ROTATION_SPEED, turn)) % (2 * math.pi)
+            frames.append((x, y, angle))
+        angle = target
+        steps = max(1, round(math.hypot(target_x - x, target_y - y) / MOVE_SPEED))
+        for step in range(1, steps + 1):
+            frames.append((x + (target_x - x) * step / steps,
+                           y + (target_y - y) * step / steps, angle))
+        x, y = target_x, target_y
+    return frames
+
+
+def make_raycaster(width, height, backend, workers):
+    # Детализация не подстраивается: замер должен видеть полную цену кадра
+    raycaster = RayCaster(width, height, backend=backend, adaptive=False, workers=workers)
+    raycaster.num_rays = width // 2  # Каждый луч - две колонки символов
+    return raycaster
+
+
+def render(raycaster, camera, maze, minimap_level):
+    raycaster.render_frame(camera, maze)
+    raycaster.render_minimap(camera, maze, level=minimap_level)
+
+
+def benchmark(path, maze, size, backend, args):
+    """Прогон пути камеры для одного размера консоли и бэкенда"""
+    width, height = size
+    raycaster = make_raycaster(width, height, backend, args.workers)
+    camera = Camera(*path[0])
+    try:
+        # Прогрев: кэши колонок, поле расстояний, мини-карта, пул процессов
+        for x, y, angle in path[:args.warmup]:
+            camera.x, camera.y, camera.angle = x, y, angle
+            render(raycaster, camera, maze, args.minimap_level)
+
+        times = []
+        clock = time.perf_counter
+        started = clock()
+        for x, y, angle in path:
+            camera.x, camera.y, camera.angle = x, y, angle
+            frame_started = clock()
+            render(raycaster, camera, maze, args.minimap_level)
+            times.append(clock() - frame_started)
+        total = clock() - started
+
+        # Память - отдельным коротким прогоном: tracemalloc сильно замедляет рендер
+        allocated, retained = [], []
+        if args.memory_frames:
+            tracemalloc.start()
+            try:
+                for x, y, angle in path[:args.memory_frames]:
+                    camera.x, camera.y, camera.angle = x, y, angle
+                    tracemalloc.reset_peak()
+                    before = tracemalloc.get_traced_memory()[0]
+                    blocks = sys.getallocatedblocks()
+                    render(raycaster, camera, maze, args.minimap_level)
+                    allocated.append(tracemalloc.get_traced_memory()[1] - before)
+                    retained.append(sys.getallocatedblocks() - blocks)
+            finally:
+                tracemalloc.stop()
+    finally:
+        raycaster.close()
+
+    return {
+        "frames": len(times),
+        "fps": len(times) / total if total else None,
+        "time_p50": percentile(times, 0.50),
+        "time_p99": percentile(times, 0.99),
+        "time_mean": statistics.mean(times),
+        "time_max": max(times),
+        "alloc_peak_mean": statistics.mean(allocated) if allocated else None,
+        "alloc_peak_max": max(allocated) if allocated else None,
+        "blocks_retained_mean": statistics.mean(retained) if retained else None,
+    }
+
+
+def compare(previous_path, results, max_regression=None):
+    """Печатает изменение p50 относительно прошлого запуска; False - если есть регрессия"""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    old = {(r["size"], r["backend"]): r for r in previous["results"]}
+    print(f"\nСравнение с {previous_path} (коммит {previous['meta'].get('commit')}):")
+    ok = True
+    for result in results:
+        before = old.get((result["size"], result["backend"]))
+        if before is None:
+            continue
+        change = result["time_p50"] / before["time_p50"] - 1 if before["time_p50"] else 0.0
+        mark = ""
+        if max_regression is not None and change > max_regression:
+            mark = "  РЕГРЕССИЯ"
+            ok = False
+        print(f"  {result['size']:<9} {result['backend']:<7} p50 {before['time_p50'] * 1000:7.2f} -> "
+              f"{result['time_p50'] * 1000:7.2f} мс ({change:+.0%}){mark}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк рендера вдоль пути камеры (без вывода кадров)")
+    parser.add_argument("--difficulty", choices=[name for name, settings in DIFFICULTIES.items()
+                                                 if not settings.get("chunked")],
+                        help="сложность генерируемого лабиринта (по умолчанию сложная)")
+    parser.add_argument("--seed", type=int, help="сид лабиринта (по умолчанию 1)")
+    parser.add_argument("--maze", help="файл .maze вместо генерации")
+    parser.add_argument("--path", help=f"записанный путь камеры в JSON (например, {DUMP_CAMERA_FILENAME})")
+    parser.add_argument("--record", help="сохранить путь камеры в JSON и продолжить")
+    parser.add_argument("--frames", type=int, default=300,
+                        help="кадров на замер (путь обрезается или повторяется)")
+    parser.add_argument("--warmup", type=int, default=10, help="кадров прогрева перед замером")
+    parser.add_argument("--size", action="append", type=parse_size,
+                        help=f"размер консоли ШИРИНАxВЫСОТА (по умолчанию {', '.join(DEFAULT_SIZES)})")
+    parser.add_argument("--backend", action="append", choices=list(RAYCAST_BACKENDS),
+                        help="бэкенд лучей (по умолчанию python и numpy, если установлен)")
+    parser.add_argument("--workers", type=int, default=1, help="процессов рендера (RENDER_WORKERS)")
+    parser.add_argument("--minimap-level", type=int, default=0, help="масштаб мини-карты")
+    parser.add_argument("--memory-frames", type=int, default=20,
+                        help="кадров с tracemalloc для памяти на кадр (0 - не мерить)")
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--compare", help="JSON прошлого запуска для сравнения")
+    parser.add_argument("--max-regression", type=float,
+                        help="с --compare: код выхода 1, если p50 вырос больше этой доли (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    recorded = None
+    if args.path:
+        with open(args.path, encoding="utf-8") as f:
+            recorded = json.load(f)
+        if isinstance(recorded, list):
+            recorded = {"frames": recorded}
+    generator, maze_name = load_maze(args, recorded)
+    maze = generator.get_maze()
+
+    path = [tuple(frame) for frame in recorded["frames"]] if recorded else scripted_path(generator)
+    if not path:
+        raise SystemExit("Путь камеры пуст")
+    if args.record:
+        with open(args.record, 'w', encoding='utf-8') as f:
+            json.dump({"difficulty": args.difficulty, "seed": generator.maze_seed,
+                       "maze": args.maze, "frames": path}, f)
+        print(f"Путь камеры сохранен в {args.record}")
+    path_length = len(path)
+    # Путь повторяется по кругу, пока не наберется нужное число кадров
+    path = [path[i % path_length] for i in range(args.frames)]
+
+    sizes = args.size or [parse_size(size) for size in DEFAULT_SIZES]
+    backends = args.backend or ["python"] + (["numpy"] if raycasting_numpy is not None else [])
+    if "numpy" in backends and raycasting_numpy is None:
+        print("NumPy не установлен, бэкенд numpy пропущен")
+        backends.remove("numpy")
+
+    print(f"Лабиринт: {maze_name}, путь камеры: {path_length} кадров, замер: {len(path)} кадров")
+    print(f"{'размер':<9} {'бэкенд':<7} {'кадр/с':>8} {'p50 мс':>8} {'p99 мс':>8} "
+          f"{'макс мс':>8} {'КБ/кадр':>8} {'блоков':>7}")
+    results = []
+    for width, height in sizes:
+        for backend in backends:
+            result = benchmark(path, maze, (width, height), backend, args)
+            result.update(size=f"{width}x{height}", backend=backend, rays=width // 2)
+            results.append(result)
+            memory = f"{result['alloc_peak_mean'] / 1024:8.1f}" if result["alloc_peak_mean"] is not None else f"{'-':>8}"
+            blocks = f"{result['blocks_retained_mean']:7.1f}" if result["blocks_retained_mean"] is not None else f"{'-':>7}"
+            print(f"{result['size']:<9} {backend:<7} {result['fps']:8.1f} {result['time_p50'] * 1000:8.2f} "
+                  f"{result['time_p99'] * 1000:8.2f} {result['time_max'] * 1000:8.2f} {memory} {blocks}")
+
+    report = {
+        "meta": {
+            "commit": git_revision(),
+            "date": time.strftime('%Y-%m-%d %H:%M:%S'),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "maze": maze_name,
+            "path": args.path,
+            "path_frames": path_length,
+            "workers": args.workers,
+            "minimap_level": args.minimap_level,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+    if args.compare and not compare(args.compare, results, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,10 @@ DIFFICULTIES = {
     "легкая": {"width": 50, "height": 50, "room_size": 3},
     "нормальная": {"width": 100, "height": 100, "room_size": 5},
     "сложная": {"width": 200, "height": 200, "room_size": 7},
-    "хардкор": {"width": 400, "height": 400, "room_size": 9},
-    "экстрим": {"width": 800, "height": 800, "room_size": 11}
+    "хардкор": {"width": 400, "height": 400, "room_size": 9, "algorithm": "dfs"},
+    "экстрим": {"width": 800, "height": 800, "room_size": 11, "algorithm": "dfs"},
+    # Мир из фрагментов, которые генерируются по мере движения (maze_world.py)
+    "бесконечная": {"width": 32769, "height": 32769, "room_size": 0, "chunked": True}
 }
 
 # Размеры карты по умолчанию (будут переопределены после выбора сложности)
@@ -23,6 +25,12 @@ PLAYER_START_SYMBOL = 'S'
 EXIT_SYMBOL = '0'
 WALL_SYMBOL = '#'
 
+# Коды клеток для компактного хранения лабиринта (MazeGrid)
+CELL_EMPTY = 0
+CELL_WALL = 1
+CELL_START = 2
+CELL_EXIT = 3
+
 # Настройки игрока
 PLAYER_HEIGHT = 0.25
 MOVE_SPEED = 0.2
@@ -32,13 +40,43 @@ ROTATION_SPEED = 0.1
 FOV = 3.14159 / 3  # 60 градусов
 MAX_RENDER_DISTANCE = 10
 NUM_RAYS = 120  # Увеличиваем количество лучей для лучшего качества
+RAYCAST_BACKEND = "auto"  # "python", "numpy" или "auto" (numpy на широких кадрах)
+RAYCAST_SKIP_EMPTY = False  # пропуск пустоты по полю расстояний до стен (для больших комнат)
+ADAPTIVE_QUALITY = True  # менять число лучей, чтобы укладываться в бюджет кадра
+RENDER_BUDGET_MS = 20  # бюджет render_frame на кадр
+RENDER_BUDGET_WINDOW = 10  # по скольким последним кадрам считается среднее
+MAX_RAY_STRIDE = 4  # бросать не реже чем каждый 4-й луч
+RENDER_WORKERS = 1  # процессов для рендера полос кадра (1 - без параллельности)
+PARALLEL_MIN_RAYS = 200  # на кадрах уже этого числа лучей процессы не окупаются
 
 # Настройки консоли (соотношение 2:1)
 CONSOLE_WIDTH = 120
 CONSOLE_HEIGHT = 40  # 120:40 = 3:1, но символы примерно 2:1 по размеру
+STATUS_MESSAGE_SECONDS = 3  # Сколько держится сообщение в строке состояния под кадром
 
 # Функция очистки консоли
 clear = lambda: os.system('cls')
 
 # config.py - добавим константу для имени файла дампа
-DUMP_FILENAME = "lastgame_dump.txt"
\ No newline at end of file
+DUMP_FILENAME = "lastgame_dump.txt"
+DUMP_MAZE_FILENAME = "lastgame_dump.maze"
+DUMP_CAMERA_FILENAME = "lastgame_camera.json"  # Путь камеры для benchmark_render.py --path
+CAMERA_PATH_MAX_FRAMES = 20000  # В дамп попадают последние кадры пути (~10 минут игры)
+
+# Кэш сгенерированных лабиринтов на диске
+MAZE_CACHE_DIR = "maze_cache"
+MAZE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # При превышении удаляются самые старые
+
+# Число процессов для параллельных попыток генерации (1 - последовательно)
+GENERATION_WORKERS = 1
+# Замер пика памяти по фазам генерации через tracemalloc (заметно замедляет генерацию)
+GENERATION_TRACE_MEMORY = False
+
+# Мир из фрагментов: размер фрагмента (четный) и сколько фрагментов держать в памяти
+CHUNK_SIZE = 32
+CHUNK_CACHE_SIZE = 64
+
+# Запас готовых лабиринтов для мгновенного рестарта (R)
+MAZE_POOL_SIZE = 2
+MAZE_POOL_PERSIST = True  # сохранять запас между запусками игры
+MAZE_POOL_FILE = "pool.json"  # в каталоге кэша, где лежат сами лабиринты запаса
\ No newline at end of file
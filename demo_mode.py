@@ -3,19 +3,26 @@ import os
 import sys
 import time
 import traceback
-from maze_generator import MazeGenerator
+from maze_background import start_generation
+from maze_cache import MazeCache
+from maze_generator import MazeGenerator, check_seed
 from demo_player import DemoPlayer
 from raycasting import RayCaster
+from terminal_presenter import TerminalPresenter
 from config import *
 
 class DemoGame:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.maze_generator = MazeGenerator()
+        self.seed = seed
+        self.maze_cache = MazeCache()
         self.player = None
         self.raycaster = RayCaster(CONSOLE_WIDTH, CONSOLE_HEIGHT)
+        self.presenter = TerminalPresenter()  # Перерисовывает только изменения кадра
         self.running = False
         self.game_won = False
         self.difficulty = "нормальная"
+        self.pending_generation = None  # Лабиринт, который строится в фоне заранее
         
     def select_difficulty(self):
         """Выбор сложности"""
@@ -23,13 +30,14 @@ class DemoGame:
         print("=== ДЕМО-РЕЖИМ: ВЫБОР СЛОЖНОСТИ ===")
         print()
         
-        difficulties = list(DIFFICULTIES.keys())
+        # Демо ищет путь по всей карте, поэтому мир из фрагментов не подходит
+        difficulties = [diff for diff in DIFFICULTIES if not DIFFICULTIES[diff].get("chunked")]
         for i, diff in enumerate(difficulties, 1):
             size = DIFFICULTIES[diff]
             print(f"{i}. {diff.capitalize()} - {size['width']}x{size['height']}")
         
         print()
-        print("Выберите сложность (1-5) или нажмите Enter для нормальной:")
+        print(f"Выберите сложность (1-{len(difficulties)}) или нажмите Enter для нормальной:")
         
         while True:
             try:
@@ -53,6 +61,9 @@ class DemoGame:
         ROOM_SIZE = DIFFICULTIES[self.difficulty]["room_size"]
         
         print(f"Выбрана сложность: {self.difficulty.capitalize()}")
+        # Начинаем строить лабиринт, пока пользователь читает этот экран
+        self.pending_generation = start_generation(self.create_generator())
+        
         print(f"Размер лабиринта: {MAP_WIDTH}x{MAP_HEIGHT}")
         print("Нажмите любую клавишу для начала демо...")
         input()
@@ -60,6 +71,16 @@ class DemoGame:
     def clear_console(self):
         """Очищает консоль"""
         clear()
+        # Экран больше не совпадает с прошлым кадром - следующий рисуется целиком
+        self.presenter.reset()
+    
+    def create_generator(self):
+        """Генератор для текущей сложности (сообщения генерации заменяет индикатор)"""
+        return MazeGenerator(MAP_WIDTH, MAP_HEIGHT, ROOM_SIZE, compact=True,
+                             guarantee_solvable=True, seed=self.seed,
+                             cache=self.maze_cache, workers=GENERATION_WORKERS,
+                             algorithm=DIFFICULTIES[self.difficulty].get("algorithm", "legacy"),
+                             verbose=False)
     
     def setup_game(self):
         """Инициализация игры"""
@@ -68,9 +89,12 @@ class DemoGame:
         print(f"Генерация лабиринта {MAP_WIDTH}x{MAP_HEIGHT}...")
         
         try:
-            self.maze_generator = MazeGenerator(MAP_WIDTH, MAP_HEIGHT, ROOM_SIZE)
+            # Берем лабиринт, начатый на экране выбора сложности, или строим новый
+            generation = self.pending_generation or start_generation(self.create_generator())
+            self.pending_generation = None
+            self.maze_generator = generation.generator
             
-            if not self.maze_generator.generate_maze():
+            if not generation.wait():
                 print("Ошибка: не удалось сгенерировать лабиринт!")
                 return False
             
@@ -85,7 +109,7 @@ class DemoGame:
                         start_y = y + 0.5
                         break
             
-            self.player = DemoPlayer(start_x, start_y)
+            self.player = DemoPlayer(start_x, start_y, self.maze_generator.get_distance_field())
             self.running = True
             self.game_won = False
             
@@ -138,25 +162,21 @@ class DemoGame:
                 if self.player.check_exit(self.maze_generator.get_maze()):
                     self.game_won = True
                 
-                # Очищаем и рендерим
-                self.clear_console()
-                
+                # Рендерим весь экран и выводим только изменения одной записью
                 # Raycasting
                 frame = self.raycaster.render_frame(self.player, self.maze_generator.get_maze())
-                print(frame)
                 
                 # Интерфейс
                 ui = self.render_ui()
-                print(ui)
                 
                 # Мини-карта
                 minimap = self.raycaster.render_minimap(self.player, self.maze_generator.get_maze())
-                print("Мини-карта:")
-                print(minimap)
                 
                 # Статистика
                 elapsed_time = time.time() - start_time
-                print(f"Время: {elapsed_time:.1f}с | Кадр: {frame_count}")
+                stats = f"Время: {elapsed_time:.1f}с | Кадр: {frame_count}"
+                
+                self.presenter.present("\n".join([frame, ui, "Мини-карта:", minimap, stats]))
                 
                 # Завершаем демо если пройдено
                 if self.game_won and self.player.state == "completed":
@@ -172,6 +192,8 @@ class DemoGame:
             print(f"\nОшибка в демо-режиме: {e}")
             traceback.print_exc()
         finally:
+            self.presenter.close()
+            self.raycaster.close()
             self.clear_console()
             if self.game_won:
                 total_time = time.time() - start_time
@@ -186,5 +208,11 @@ class DemoGame:
             input()
 
 if __name__ == "__main__":
-    game = DemoGame()
+    # Необязательный аргумент - сид лабиринта: python demo_mode.py 12345
+    try:
+        seed = check_seed(int(sys.argv[1])) if len(sys.argv) > 1 else None
+    except ValueError as e:
+        print(f"Неверный сид: {e}")
+        sys.exit(1)
+    game = DemoGame(seed)
     game.run()
\ No newline at end of file
@@ -1,13 +1,17 @@
 # demo_player.py - автоматический игрок для демо-режима с предпочтением поворотов
 import math
 import time
+from array import array
 from collections import deque
 from config import *
+from maze_grid import as_grid
 
 class DemoPlayer:
-    def __init__(self, x, y):
+    def __init__(self, x, y, distance_field=None):
         self.x = x
         self.y = y
+        # Поле расстояний от старта из MazeGenerator - путь строится без BFS
+        self.distance_field = distance_field
         self.angle = 0
         self.move_speed = MOVE_SPEED
         self.rotation_speed = ROTATION_SPEED
@@ -35,17 +39,14 @@ class DemoPlayer:
         """Находит путь до выхода с помощью BFS"""
         print("Поиск пути до выхода...")
         
+        # BFS идет по компактной сетке: целые коды и плоские индексы
+        grid = as_grid(maze)
+        width, height = grid.width, grid.height
+        cells = grid.cells
+        
         # Находим стартовую позицию и выход
         start_pos = (int(self.x), int(self.y))
-        exit_pos = None
-        
-        for y in range(len(maze)):
-            for x in range(len(maze[0])):
-                if maze[y][x] == EXIT_SYMBOL:
-                    exit_pos = (x, y)
-                    break
-            if exit_pos:
-                break
+        exit_pos = grid.find(CELL_EXIT)
         
         if not exit_pos:
             print("Выход не найден!")
@@ -53,33 +54,67 @@ class DemoPlayer:
         
         print(f"Старт: {start_pos}, Выход: {exit_pos}")
         
-        # BFS поиск пути
-        queue = deque()
-        queue.append((start_pos, []))
-        visited = set([start_pos])
+        start_index = start_pos[1] * width + start_pos[0]
+        exit_index = exit_pos[1] * width + exit_pos[0]
+        
+        # Готовое поле расстояний от нашей клетки: спускаемся от выхода к старту
+        field = self.distance_field
+        if field is not None and field[start_index] == 0 and field[exit_index] > 0:
+            self.path = self._path_from_distance_field(field, width, exit_index)
+            print(f"Путь найден! Длина: {len(self.path)} шагов")
+            return True
+        
+        # BFS поиск пути: для каждой клетки запоминаем предыдущую
+        parent = array('i', [-1]) * (width * height)
+        parent[start_index] = start_index
+        queue = deque([start_index])
         
         while queue:
-            (x, y), path = queue.popleft()
+            index = queue.popleft()
             
             # Проверяем, достигли ли выхода
-            if (x, y) == exit_pos:
-                self.path = path + [(x, y)]
+            if index == exit_index:
+                path = []
+                while index != start_index:
+                    path.append((index % width, index // width))
+                    index = parent[index]
+                path.append(start_pos)
+                path.reverse()
+                self.path = path
                 print(f"Путь найден! Длина: {len(self.path)} шагов")
                 return True
             
             # Проверяем соседние клетки
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                if (0 <= nx < len(maze[0]) and 0 <= ny < len(maze) and
-                    (nx, ny) not in visited and
-                    maze[ny][nx] in (EMPTY_SYMBOL, EXIT_SYMBOL, PLAYER_START_SYMBOL)):
-                    
-                    visited.add((nx, ny))
-                    queue.append(((nx, ny), path + [(x, y)]))
+            x = index % width
+            for neighbor, inside in ((index + width, index + width < len(cells)),
+                                     (index + 1, x + 1 < width),
+                                     (index - width, index >= width),
+                                     (index - 1, x > 0)):
+                if inside and parent[neighbor] < 0 and cells[neighbor] != CELL_WALL:
+                    parent[neighbor] = index
+                    queue.append(neighbor)
         
         print("Путь до выхода не найден!")
         return False
     
+    def _path_from_distance_field(self, field, width, exit_index):
+        """Восстанавливает кратчайший путь по полю расстояний от старта"""
+        index = exit_index
+        path = [(index % width, index // width)]
+        while field[index] > 0:
+            x = index % width
+            previous_distance = field[index] - 1
+            for neighbor, inside in ((index + width, index + width < len(field)),
+                                     (index + 1, x + 1 < width),
+                                     (index - width, index >= width),
+                                     (index - 1, x > 0)):
+                if inside and field[neighbor] == previous_distance:
+                    index = neighbor
+                    break
+            path.append((index % width, index // width))
+        path.reverse()
+        return path
+    
     def _get_direction_angle(self, current_pos, next_pos):
         """Определяет угол направления к следующей позиции"""
         dx = next_pos[0] - current_pos[0]
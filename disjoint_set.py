@@ -0,0 +1,36 @@
+# disjoint_set.py - система непересекающихся множеств (union-find)
+
+
+class DisjointSet:
+    """Union-find со сжатием путей и объединением по размеру"""
+
+    def __init__(self, size=0):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def add(self):
+        """Добавляет новое одноэлементное множество и возвращает его номер"""
+        index = len(self.parent)
+        self.parent.append(index)
+        self.size.append(1)
+        return index
+
+    def find(self, item):
+        """Возвращает представителя множества"""
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        """Объединяет множества; возвращает False, если они уже совпадали"""
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return True
@@ -0,0 +1,32 @@
+# frame_buffer.py - буфер кадра консоли: колонки пишутся сразу в строки экрана
+FRAME_ENCODING = 'ascii'
+
+
+class FrameBuffer:
+    """Кадр width x height в одном bytearray, строка за строкой.
+
+    Каждая строка занимает width байт и заканчивается переводом строки,
+    поэтому колонка x - это срез buffer[x::width + 1]: вертикальная колонка
+    пишется одним присваиванием среза вместо height отдельных символов.
+    Символы однобайтовые (FRAME_ENCODING).
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.stride = width + 1
+        self.buffer = bytearray(b' ' * (self.stride * height))
+        self.buffer[width::self.stride] = b'\n' * height
+
+    def write_column(self, x, column, repeat=1):
+        """Пишет колонку (bytes длиной height) в колонки x .. x + repeat - 1.
+
+        repeat=2 дает широкий пиксель для соотношения символов 2:1.
+        """
+        end = self.stride * self.height
+        for offset in range(x, x + repeat):
+            self.buffer[offset:end:self.stride] = column
+
+    def to_string(self):
+        """Весь кадр одной строкой (без перевода строки в конце)"""
+        return self.buffer[:-1].decode(FRAME_ENCODING) if self.height else ""
@@ -1,22 +1,32 @@
 # main2.py - с полностью переработанным демо-режимом
+import json
 import os
 import sys
 import math
 import time
 import msvcrt  # Для Windows input
 import traceback  # Для сохранения ошибок
+from collections import deque
 import random
 
-from maze_generator import MazeGenerator
+from maze_background import start_generation
+from maze_cache import MazeCache
+from maze_generator import MazeGenerator, check_seed
+from maze_pool import MazePool
+from maze_world import ChunkedMazeGenerator
 from player import Player
 from raycasting import RayCaster
+from terminal_presenter import TerminalPresenter
 from config import *
 
 class MazeGame:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.maze_generator = MazeGenerator()
+        self.seed = seed  # Фиксированный сид: рестарт открывает тот же лабиринт
+        self.maze_cache = MazeCache()
         self.player = None
         self.raycaster = RayCaster(CONSOLE_WIDTH, CONSOLE_HEIGHT)
+        self.presenter = TerminalPresenter()  # Перерисовывает только изменения кадра
         self.running = False
         self.game_won = False
         self.console_output = []  # Храним вывод консоли
@@ -24,6 +34,13 @@ class MazeGame:
         self.pressed_keys = set()  # Множество нажатых клавиш
         self.difficulty = "легкая"  # Сложность по умолчанию
         self._last_i_state = False  # Исправлено: инициализируем здесь
+        self.minimap_level = 0  # Масштаб мини-карты (0 - клетка в клетку)
+        self._last_m_state = False
+        self._last_l_state = False
+        self.pending_generation = None  # Лабиринт, который строится в фоне заранее
+        self.status_message = ""  # Строка состояния под кадром
+        self.status_time = 0.0
+        self.maze_pool = None  # Запас готовых лабиринтов для рестарта
         
     def select_difficulty(self):
         """Выбор сложности игры"""
@@ -37,7 +54,7 @@ class MazeGame:
             print(f"{i}. {diff.capitalize()} - {size['width']}x{size['height']} (комнаты: {size['room_size']}x{size['room_size']})")
         
         print()
-        print("Выберите сложность (1-5) или нажмите Enter для стандартной (легкая):")
+        print(f"Выберите сложность (1-{len(difficulties)}) или нажмите Enter для стандартной (легкая):")
         
         while True:
             try:
@@ -64,6 +81,12 @@ class MazeGame:
         # Пересоздаем генератор лабиринта с новыми размерами
         self.maze_generator = MazeGenerator()
         
+        # Начинаем строить лабиринт, пока игрок читает этот экран,
+        # если в запасе с прошлого запуска нет готового
+        self.maze_pool = self.create_pool()
+        if self.maze_pool is None or not self.maze_pool.ready:
+            self.pending_generation = start_generation(self.create_generator())
+        
         print(f"Выбрана сложность: {self.difficulty.capitalize()}")
         print(f"Размер лабиринта: {MAP_WIDTH}x{MAP_HEIGHT}")
         print(f"Размер комнат: {ROOM_SIZE}x{ROOM_SIZE}")
@@ -73,11 +96,23 @@ class MazeGame:
     def clear_console(self):
         """Очищает консоль"""
         clear()
+        # Экран больше не совпадает с прошлым кадром - следующий рисуется целиком
+        self.presenter.reset()
     
     def save_console_output(self, text):
         """Сохраняет вывод консоли для дампа"""
         self.console_output.append(text)
     
+    def show_status(self, text):
+        """Показывает сообщение в строке состояния под кадром.
+        
+        Во время игры print() нельзя: кадр перерисовывается только там,
+        где он изменился, и напечатанный текст сдвинул бы экран.
+        """
+        self.status_message = text
+        self.status_time = time.time()
+        self.save_console_output(text)
+    
     def create_dump_file(self, error_info=None):
         """Создает файл дампа с содержимым консоли и полной картой"""
         try:
@@ -87,6 +122,7 @@ class MazeGame:
                 f.write(f"Сложность: {self.difficulty.capitalize()}\n")
                 f.write(f"Ожидаемый размер: {MAP_WIDTH}x{MAP_HEIGHT}\n")
                 f.write(f"Размер комнат: {ROOM_SIZE}x{ROOM_SIZE}\n")
+                f.write(f"Сид: {self.maze_generator.maze_seed}\n")
                 f.write(f"Статус: {'ПОБЕДА' if self.game_won else 'В ПРОЦЕССЕ'}\n")
                 f.write(f"Режим: НОРМАЛЬНЫЙ\n")
             
@@ -135,14 +171,68 @@ class MazeGame:
                     full_map = self.maze_generator.get_maze_string()
                     f.write(full_map)
             
+                # Время, память и счетчики по фазам последней генерации
+                stats = getattr(self.maze_generator, "stats", None)
+                if stats is not None:
+                    f.write(f"\n=== СТАТИСТИКА ГЕНЕРАЦИИ ===\n")
+                    f.write(stats.format() + "\n")
+                    f.write(stats.to_json() + "\n")
+            
                 f.write(f"\n=== СИСТЕМНАЯ ИНФОРМАЦИЯ ===\n")
                 f.write(f"Ожидаемый размер: {MAP_WIDTH}x{MAP_HEIGHT}\n")
                 f.write(f"FOV: {math.degrees(FOV):.1f}°\n")
                 f.write(f"Макс. дистанция рендера: {MAX_RENDER_DISTANCE}\n")
             
-            print(f"\nДамп игры сохранен в файл: {DUMP_FILENAME}")
+                # Фоновые части игры не печатают поверх кадра - их ошибки здесь
+                errors = list(self.maze_cache.errors)
+                if self.maze_pool is not None:
+                    errors += self.maze_pool.errors
+                if self.raycaster.parallel is not None and self.raycaster.parallel.error:
+                    errors.append(self.raycaster.parallel.error)
+                if errors:
+                    f.write(f"\n=== ФОНОВЫЕ ОШИБКИ ===\n")
+                    for error in errors:
+                        f.write(error + "\n")
+            
+            saved = [DUMP_FILENAME]
+            
+            # Карта в двоичном формате - ее можно открыть через maze_file.open_maze
+            if isinstance(self.maze_generator, MazeGenerator) and self.maze_generator.get_maze():
+                self.maze_generator.save_to_file(DUMP_MAZE_FILENAME)
+                self.save_camera_path()
+                saved += [DUMP_MAZE_FILENAME, DUMP_CAMERA_FILENAME]
+            self.show_status(f"Дамп игры сохранен: {', '.join(saved)}")
         except Exception as e:
-            print(f"Ошибка при создании дампа: {e}")
+            self.show_status(f"Ошибка при создании дампа: {e}")
+    
+    def save_camera_path(self):
+        """Путь камеры за игру: его можно прогнать через benchmark_render.py --path"""
+        with open(DUMP_CAMERA_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump({
+                "difficulty": self.difficulty,
+                "seed": self.maze_generator.maze_seed,
+                "maze": DUMP_MAZE_FILENAME,
+                "frames": list(self.camera_path),
+            }, f)
+    
+    def create_generator(self):
+        """Генератор для текущей сложности (сообщения генерации заменяет индикатор)"""
+        if DIFFICULTIES[self.difficulty].get("chunked"):
+            # Огромный мир: фрагменты строятся по мере движения игрока
+            return ChunkedMazeGenerator(MAP_WIDTH, MAP_HEIGHT, seed=self.seed, verbose=False)
+        return MazeGenerator(MAP_WIDTH, MAP_HEIGHT, ROOM_SIZE, compact=True,
+                             guarantee_solvable=True, seed=self.seed,
+                             cache=self.maze_cache, workers=GENERATION_WORKERS,
+                             algorithm=DIFFICULTIES[self.difficulty].get("algorithm", "legacy"),
+                             trace_memory=GENERATION_TRACE_MEMORY, verbose=False)
+    
+    def create_pool(self):
+        """Запас лабиринтов текущей сложности (не нужен при фиксированном сиде и для мира)"""
+        if self.seed is not None or DIFFICULTIES[self.difficulty].get("chunked"):
+            return None
+        return MazePool(self.difficulty, MAP_WIDTH, MAP_HEIGHT, ROOM_SIZE, self.maze_cache,
+                        compact=True, guarantee_solvable=True,
+                        algorithm=DIFFICULTIES[self.difficulty].get("algorithm", "legacy"))
     
     def setup_game(self):
         """Инициализация игры"""
@@ -151,6 +241,11 @@ class MazeGame:
         self.show_interface = True
         self.pressed_keys = set()
         self._last_i_state = False
+        self.minimap_level = 0
+        self._last_l_state = False
+        # (x, y, угол) последних кадров - для бенчмарка рендера
+        self.camera_path = deque(maxlen=CAMERA_PATH_MAX_FRAMES)
+        self.status_message = ""
     
         print(f"Сложность: {self.difficulty.capitalize()}")
         print(f"Размер лабиринта: {MAP_WIDTH}x{MAP_HEIGHT}")
@@ -158,10 +253,22 @@ class MazeGame:
         print("Генерация лабиринта...")
     
         try:
-            # ПЕРЕСОЗДАЕМ генератор с ПРАВИЛЬНЫМИ размерами
-            self.maze_generator = MazeGenerator(MAP_WIDTH, MAP_HEIGHT, ROOM_SIZE)
+            # Берем готовый лабиринт из запаса, начатый на экране выбора сложности
+            # или, если ни того ни другого нет, строим новый
+            generator = None
+            if self.pending_generation is None and self.maze_pool is not None:
+                generator = self.maze_pool.take()
+            if generator is not None:
+                self.maze_generator = generator
+                generated = True
+                print("Лабиринт взят из запаса готовых")
+            else:
+                generation = self.pending_generation or start_generation(self.create_generator())
+                self.pending_generation = None
+                self.maze_generator = generation.generator
+                generated = generation.wait()
         
-            if not self.maze_generator.generate_maze():
+            if not generated:
                 error_msg = "Ошибка: не удалось сгенерировать проходимый лабиринт!"
                 print(error_msg)
                 self.save_console_output(error_msg)
@@ -195,6 +302,15 @@ class MazeGame:
         
             success_msg = f"Лабиринт {MAP_WIDTH}x{MAP_HEIGHT} сгенерирован успешно!"
             print(success_msg)
+            if self.maze_generator.attempt_times:
+                print(f"Попыток: {self.maze_generator.attempts}, "
+                      f"время последней: {self.maze_generator.attempt_times[-1]:.2f}с")
+            else:
+                print(f"Лабиринт загружен из кэша (сид {self.maze_generator.maze_seed})")
+            
+            # Пока идет игра, в фоне готовим лабиринты для следующего рестарта
+            if self.maze_pool is not None:
+                self.maze_pool.refill()
             return True
         
         except MemoryError:
@@ -216,7 +332,7 @@ class MazeGame:
             while msvcrt.kbhit():
                 try:
                     key = msvcrt.getch().decode('utf-8').lower()
-                    if key in ['w', 'a', 's', 'd', 'z', 'c', 'q', 'r', 'l', 'i']:
+                    if key in ['w', 'a', 's', 'd', 'z', 'c', 'q', 'r', 'l', 'i', 'm']:
                         new_presses.add(key)
                 except:
                     pass  # Игнорируем специальные клавиши
@@ -230,21 +346,23 @@ class MazeGame:
             
             if 'q' in self.pressed_keys:
                 self.running = False
-                print("Выход из игры...")
-                self.save_console_output("Выход из игры...")
+                self.show_status("Выход из игры...")
                 return
             
             if 'r' in self.pressed_keys:
-                print("Рестарт игры...")
                 self.save_console_output("Рестарт игры...")
                 self.setup_game()
                 return
             
+            # Дамп пишется один раз на нажатие: удержание L не перезаписывает
+            # файлы каждый кадр
             if 'l' in self.pressed_keys:
-                print("Создание дампа игры...")
-                self.save_console_output("Создание дампа игры...")
-                self.create_dump_file()
-                # Не удаляем 'l', чтобы можно было удерживать для многократного сохранения
+                if not self._last_l_state:
+                    self.save_console_output("Создание дампа игры...")
+                    self.create_dump_file()
+                    self._last_l_state = True
+            else:
+                self._last_l_state = False
             
             # ИСПРАВЛЕННАЯ ОБРАБОТКА КНОПКИ 'I'
             if 'i' in self.pressed_keys:
@@ -252,15 +370,23 @@ class MazeGame:
                 if not self._last_i_state:
                     self.show_interface = not self.show_interface
                     if self.show_interface:
-                        print("Интерфейс включен")
-                        self.save_console_output("Интерфейс включен")
+                        self.show_status("Интерфейс включен")
                     else:
-                        print("Интерфейс скрыт")
-                        self.save_console_output("Интерфейс скрыт")
+                        self.show_status("Интерфейс скрыт")
                     self._last_i_state = True
             else:
                 self._last_i_state = False
             
+            # Масштаб мини-карты: каждое нажатие уменьшает вдвое, после обзора
+            # всей карты - снова клетка в клетку
+            if 'm' in self.pressed_keys:
+                if not self._last_m_state:
+                    levels = self.raycaster.minimap_levels(maze)
+                    self.minimap_level = (self.minimap_level + 1) % levels
+                    self._last_m_state = True
+            else:
+                self._last_m_state = False
+            
             # Обработка одновременного движения и поворота
             move_forward = 'w' in self.pressed_keys
             move_backward = 's' in self.pressed_keys
@@ -287,12 +413,19 @@ class MazeGame:
             # Игнорируем ошибки декодирования (специальные клавиши)
             pass
     
+    def render_status(self):
+        """Строка состояния: последнее сообщение, пока оно не устарело"""
+        if self.status_message and time.time() - self.status_time < STATUS_MESSAGE_SECONDS:
+            return self.status_message + "\n"
+        return ""
+    
     def render_ui(self):
         """Рендерит интерфейс пользователя"""
         if not self.show_interface:
             # Минималистичный интерфейс
             ui = "\n" + "=" * CONSOLE_WIDTH + "\n"
             ui += "Нажмите I для отображения интерфейса\n"
+            ui += self.render_status()
             ui += "=" * CONSOLE_WIDTH + "\n"
             return ui
         
@@ -302,7 +435,7 @@ class MazeGame:
         
         ui += "Управление: W/S - вперед/назад, A/D - поворот\n"
         ui += "Z/C - стрейф влево/вправо, Q - выход, I - интерфейс\n"
-        ui += "R - рестарт, L - сохранить дамп игры\n"
+        ui += "R - рестарт, L - сохранить дамп игры, M - масштаб мини-карты\n"
         
         ui += f"Позиция: ({self.player.x:.1f}, {self.player.y:.1f}) | "
         ui += f"Угол: {self.player.get_angle_degrees():.1f}°\n"
@@ -311,6 +444,8 @@ class MazeGame:
             active_keys = ', '.join(self.pressed_keys).upper()
             ui += f"Активные клавиши: {active_keys}\n"
         
+        ui += self.render_status()
+        
         if self.player.check_exit(self.maze_generator.get_maze()):
             self.game_won = True
             self.running = False
@@ -336,6 +471,9 @@ class MazeGame:
         self.select_difficulty()
         
         if not self.setup_game():
+            # Игра не началась - кадр не рисуется, сообщение печатаем
+            if self.status_message:
+                print(self.status_message)
             return
         
         frame_count = 0
@@ -366,40 +504,50 @@ class MazeGame:
                     input()
                     break
                 
-                # Очистка консоли и рендеринг
-                self.clear_console()
+                # Собираем весь экран и выводим его одной записью:
+                # в терминал уходят только изменившиеся участки
+                screen = []
                 
                 # Raycasting рендер
+                self.camera_path.append((round(self.player.x, 4), round(self.player.y, 4),
+                                         round(self.player.angle, 4)))
                 frame = self.raycaster.render_frame(
                     self.player, 
                     self.maze_generator.get_maze()
                 )
-                print(frame)
+                screen.append(frame)
                 self.save_console_output(frame)
                 
                 # UI
                 ui_text = self.render_ui()
                 if ui_text:  # Если не пустая строка (не экран победы)
-                    print(ui_text)
+                    screen.append(ui_text)
                     self.save_console_output(ui_text)
                 
                 # Мини-карта (показываем только при включенном интерфейсе)
                 if self.show_interface:
                     minimap = self.raycaster.render_minimap(
                         self.player, 
-                        self.maze_generator.get_maze()
+                        self.maze_generator.get_maze(),
+                        level=self.minimap_level
                     )
-                    print("Мини-карта:")
-                    print(minimap)
-                    self.save_console_output("Мини-карта:")
+                    title = "Мини-карта:" if not self.minimap_level else f"Мини-карта (1:{2 ** self.minimap_level}):"
+                    screen.append(title)
+                    screen.append(minimap)
+                    self.save_console_output(title)
                     self.save_console_output(minimap)
                 
                 # Отладочная информация (только при включенном интерфейсе)
                 if self.show_interface:
                     debug_info = f"Кадр: {frame_count}"
-                    print(debug_info)
+                    quality = self.raycaster.quality
+                    if quality is not None and quality.level:
+                        debug_info += f" | Лучей: 1/{quality.stride}" + (" (грубо)" if quality.widen else "")
+                    screen.append(debug_info)
                     self.save_console_output(debug_info)
                 
+                self.presenter.present("\n".join(screen))
+                
                 # Задержка между кадрами для плавности
                 time.sleep(0.03)
                 
@@ -415,6 +563,12 @@ class MazeGame:
             tb = traceback.format_exc()
             self.create_dump_file(f"{error_msg}\n{tb}")
         finally:
+            if self.maze_pool is not None:
+                self.maze_pool.close()
+            
+            self.presenter.close()
+            self.raycaster.close()
+            
             # Автоматически создаем дамп при завершении игры
             if not self.game_won:
                 self.create_dump_file("Игра завершена")
@@ -425,5 +579,11 @@ class MazeGame:
                 print(f"Дамп игры сохранен в: {DUMP_FILENAME}")
 
 if __name__ == "__main__":
-    game = MazeGame()
+    # Необязательный аргумент - сид лабиринта: python main2.py 12345
+    try:
+        seed = check_seed(int(sys.argv[1])) if len(sys.argv) > 1 else None
+    except ValueError as e:
+        print(f"Неверный сид: {e}")
+        sys.exit(1)
+    game = MazeGame(seed)
     game.run()
\ No newline at end of file
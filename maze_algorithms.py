@@ -0,0 +1,244 @@
+# maze_algorithms.py - сменные алгоритмы построения базового лабиринта
+from config import *
+from disjoint_set import DisjointSet
+
+
+class Lattice:
+    """Решетка ячеек corridor_width x corridor_width, разделенных стенами в одну клетку.
+
+    Ячейка (i, j) занимает клетки от (1 + i * pitch, 1 + j * pitch), где
+    pitch = corridor_width + 1. Ячейки нумеруются j * cols + i; алгоритмы
+    работают с номерами, а Lattice вырезает ячейки и проходы в generator.maze.
+    """
+
+    def __init__(self, maze, width, height, corridor_width, progress=None):
+        self.maze = maze
+        # progress(доля вырезанных ячеек) - вызывается раз в 1024 ячейки
+        self.progress = progress
+        self.opened = 0
+        self.corridor_width = corridor_width
+        self.pitch = corridor_width + 1
+        self.cols = (width - 2 - corridor_width) // self.pitch + 1
+        self.rows = (height - 2 - corridor_width) // self.pitch + 1
+        self.size = self.cols * self.rows
+        self._empty = [EMPTY_SYMBOL] * corridor_width
+
+    def open_cell(self, cell):
+        """Вырезает ячейку"""
+        self.opened += 1
+        if self.opened & 1023 == 0 and self.progress is not None:
+            self.progress(self.opened / self.size)
+        x = 1 + (cell % self.cols) * self.pitch
+        y = 1 + (cell // self.cols) * self.pitch
+        for row in self.maze[y:y + self.corridor_width]:
+            row[x:x + self.corridor_width] = self._empty
+
+    def open_passage(self, a, b):
+        """Вырезает проход между соседними ячейками a и b (соседи справа или снизу)"""
+        if a > b:
+            a, b = b, a
+        x = 1 + (a % self.cols) * self.pitch
+        y = 1 + (a // self.cols) * self.pitch
+        if b == a + 1:
+            # Стена справа от a
+            for row in self.maze[y:y + self.corridor_width]:
+                row[x + self.corridor_width] = EMPTY_SYMBOL
+        else:
+            # Стена снизу от a
+            self.maze[y + self.corridor_width][x:x + self.corridor_width] = self._empty
+
+    def neighbors(self, cell):
+        """Соседние ячейки (слева, справа, сверху, снизу)"""
+        i = cell % self.cols
+        result = []
+        if i > 0:
+            result.append(cell - 1)
+        if i < self.cols - 1:
+            result.append(cell + 1)
+        if cell >= self.cols:
+            result.append(cell - self.cols)
+        if cell + self.cols < self.size:
+            result.append(cell + self.cols)
+        return result
+
+
+class MazeAlgorithm:
+    """Стратегия построения базового лабиринта.
+
+    carve(generator) заполняет generator.maze (список списков символов)
+    стенами и вырезает в нем лабиринт; дальше генератор, как обычно,
+    добавляет случайные проходы, комнаты, старт и выход.
+    """
+
+    name = None
+    # Доля площади, которую занимают комнаты поверх готового лабиринта
+    room_density = 0.15
+
+    def corridor_width(self, generator):
+        """Ширина коридоров по размеру карты - как у исходного DFS"""
+        if generator.width >= 800:
+            return generator.rng.randint(2, 3)
+        if generator.width >= 200:
+            return 2
+        return 1
+
+    def carve(self, generator):
+        generator.maze = [[WALL_SYMBOL] * generator.width for _ in range(generator.height)]
+        lattice = Lattice(generator.maze, generator.width, generator.height,
+                          self.corridor_width(generator), generator.report_carving)
+        self.carve_lattice(lattice, generator.rng)
+        generator.stats.count("cells", lattice.size)
+        self.add_rooms(generator)
+
+    def carve_lattice(self, lattice, rng):
+        """Соединяет все ячейки решетки (идеальный лабиринт)"""
+        raise NotImplementedError
+
+    def add_rooms(self, generator):
+        """Вырезает комнаты поверх лабиринта: стены убираются, связность не теряется"""
+        size = generator.room_size
+        if generator.width - size - 4 < 2 or generator.height - size - 4 < 2:
+            return
+        count = int(generator.width * generator.height * self.room_density) // (size * size)
+        for _ in range(count):
+            x = generator.rng.randint(2, generator.width - size - 3)
+            y = generator.rng.randint(2, generator.height - size - 3)
+            generator._create_room(x, y, size)
+        generator.stats.count("rooms_created", count)
+
+
+class LegacyDFS(MazeAlgorithm):
+    """Исходный DFS генератора с шагом 2-3, комнатами по ходу и лимитом шагов"""
+
+    name = "legacy"
+
+    def carve(self, generator):
+        generator._generate_base_maze()
+
+
+class IterativeDFS(MazeAlgorithm):
+    """Поиск в глубину с возвратом без лимита шагов: длинные извилистые коридоры"""
+
+    name = "dfs"
+
+    def carve_lattice(self, lattice, rng):
+        visited = bytearray(lattice.size)
+        visited[0] = 1
+        lattice.open_cell(0)
+        stack = [0]
+        while stack:
+            cell = stack[-1]
+            candidates = [n for n in lattice.neighbors(cell) if not visited[n]]
+            if not candidates:
+                stack.pop()
+                continue
+            neighbor = rng.choice(candidates)
+            visited[neighbor] = 1
+            lattice.open_cell(neighbor)
+            lattice.open_passage(cell, neighbor)
+            stack.append(neighbor)
+
+
+class Kruskal(MazeAlgorithm):
+    """Случайный Краскал: стены между ячейками убираются в случайном порядке,
+    если соединяют разные множества (union-find)"""
+
+    name = "kruskal"
+
+    def carve_lattice(self, lattice, rng):
+        cols, size = lattice.cols, lattice.size
+        edges = []
+        for cell in range(size):
+            lattice.open_cell(cell)
+            if cell % cols < cols - 1:
+                edges.append((cell, cell + 1))
+            if cell + cols < size:
+                edges.append((cell, cell + cols))
+        rng.shuffle(edges)
+
+        sets = DisjointSet(size)
+        for a, b in edges:
+            if sets.union(a, b):
+                lattice.open_passage(a, b)
+
+
+class Wilson(MazeAlgorithm):
+    """Алгоритм Уилсона: случайные блуждания со стиранием петель.
+    Дает равномерно случайное остовное дерево, но медленнее остальных"""
+
+    name = "wilson"
+
+    def carve_lattice(self, lattice, rng):
+        size = lattice.size
+        in_tree = bytearray(size)
+        root = rng.randrange(size)
+        in_tree[root] = 1
+        lattice.open_cell(root)
+        next_cell = [0] * size
+
+        for start in range(size):
+            if in_tree[start]:
+                continue
+            # Блуждаем до дерева, запоминая последний выход из каждой ячейки:
+            # так петли стираются сами собой
+            cell = start
+            while not in_tree[cell]:
+                neighbors = lattice.neighbors(cell)
+                next_cell[cell] = neighbors[rng.randrange(len(neighbors))]
+                cell = next_cell[cell]
+            # Присоединяем путь без петель к дереву
+            cell = start
+            while not in_tree[cell]:
+                in_tree[cell] = 1
+                lattice.open_cell(cell)
+                lattice.open_passage(cell, next_cell[cell])
+                cell = next_cell[cell]
+
+
+class BinaryTree(MazeAlgorithm):
+    """Двоичное дерево: из каждой ячейки проход вверх или влево.
+    Самый быстрый, но с заметным диагональным перекосом и прямыми краями"""
+
+    name = "binary_tree"
+
+    def carve_lattice(self, lattice, rng):
+        cols = lattice.cols
+        for cell in range(lattice.size):
+            lattice.open_cell(cell)
+            options = []
+            if cell >= cols:
+                options.append(cell - cols)
+            if cell % cols:
+                options.append(cell - 1)
+            if options:
+                lattice.open_passage(cell, options[rng.randrange(len(options))])
+
+
+class Sidewinder(MazeAlgorithm):
+    """Sidewinder: строка за строкой, серии проходов вправо с одним выходом вверх"""
+
+    name = "sidewinder"
+
+    def carve_lattice(self, lattice, rng):
+        cols = lattice.cols
+        for row_start in range(0, lattice.size, cols):
+            run_start = row_start
+            for cell in range(row_start, row_start + cols):
+                lattice.open_cell(cell)
+                last_in_row = cell == row_start + cols - 1
+                if row_start == 0:
+                    # Верхняя строка - один сплошной коридор
+                    if not last_in_row:
+                        lattice.open_passage(cell, cell + 1)
+                elif last_in_row or rng.random() < 0.5:
+                    # Закрываем серию: из случайной ее ячейки - проход вверх
+                    chosen = rng.randint(run_start, cell)
+                    lattice.open_passage(chosen, chosen - cols)
+                    run_start = cell + 1
+                else:
+                    lattice.open_passage(cell, cell + 1)
+
+
+# Доступные алгоритмы по имени
+ALGORITHMS = {algorithm.name: algorithm for algorithm in
+              (LegacyDFS, IterativeDFS, Kruskal, Wilson, BinaryTree, Sidewinder)}
@@ -0,0 +1,98 @@
+# maze_background.py - генерация лабиринта в фоновом потоке с индикатором прогресса
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+# Подписи этапов генерации для индикатора
+STAGE_NAMES = {
+    "start": "подготовка",
+    "cache_load": "загрузка из кэша",
+    "base_maze": "коридоры",
+    "numpy_passes": "проходы",
+    "random_paths": "случайные проходы",
+    "place_start": "старт",
+    "place_exit": "выход",
+    "connect_exit": "путь к выходу",
+    "solvability": "проверка проходимости",
+    "parallel": "попытки в процессах",
+    "done": "готово",
+}
+
+
+class GenerationProgress:
+    """Последнее состояние генерации; обновляется из рабочего потока"""
+
+    def __init__(self):
+        self.fraction = 0.0
+        self.stage = "start"
+        self.attempt = 0
+
+    def __call__(self, fraction, stage, attempt):
+        # Присваивания атрибутов атомарны, блокировка не нужна
+        self.fraction = fraction
+        self.stage = stage
+        self.attempt = attempt
+
+    def format_bar(self, width=40):
+        """Строка индикатора: [#######.....]  45% попытка 1: коридоры"""
+        filled = int(width * min(max(self.fraction, 0.0), 1.0))
+        stage = STAGE_NAMES.get(self.stage, self.stage)
+        attempt = f"попытка {self.attempt}: " if self.attempt else ""
+        return f"[{'#' * filled}{'.' * (width - filled)}] {self.fraction:4.0%} {attempt}{stage}"
+
+
+class BackgroundGeneration:
+    """Генерация, запущенная в фоне.
+
+    future - concurrent.futures.Future с результатом generate_maze();
+    progress - GenerationProgress; generator - сам генератор.
+    """
+
+    def __init__(self, generator, future, progress):
+        self.generator = generator
+        self.future = future
+        self.progress = progress
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """Результат generate_maze() (ошибка генерации пробрасывается)"""
+        return self.future.result(timeout)
+
+    def wait(self, show_progress=True, interval=0.1, stream=None):
+        """Ждет окончания, перерисовывая индикатор в одной строке консоли"""
+        stream = stream or sys.stdout
+        if show_progress:
+            while not self.future.done():
+                stream.write("\r" + self.progress.format_bar() + " " * 8)
+                stream.flush()
+                time.sleep(interval)
+            stream.write("\r" + self.progress.format_bar() + " " * 8 + "\n")
+            stream.flush()
+        return self.result()
+
+
+def start_generation(generator, callback=None):
+    """Запускает generator.generate_maze() в фоновом потоке.
+
+    callback(future) вызывается по окончании (из рабочего потока).
+    Поток - демон: выход из программы не ждет недостроенный лабиринт.
+    """
+    progress = GenerationProgress()
+    generator.progress = progress
+    future = Future()
+    if callback is not None:
+        future.add_done_callback(callback)
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(generator.generate_maze())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="maze-generation", daemon=True).start()
+    return BackgroundGeneration(generator, future, progress)
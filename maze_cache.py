@@ -0,0 +1,78 @@
+# maze_cache.py - кэш готовых лабиринтов на диске с вытеснением давно использованных
+import hashlib
+import os
+from config import *
+from maze_file import open_maze, write_maze
+
+CACHE_SUFFIX = ".maze"
+
+
+class MazeCache:
+    """Каталог с готовыми лабиринтами, ключ - параметры генерации и сид.
+
+    Кэш читается и во время игры (запас лабиринтов), поэтому ничего не
+    печатает: поврежденные записи перечисляются в errors.
+    """
+
+    def __init__(self, directory=MAZE_CACHE_DIR, max_bytes=MAZE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.errors = []
+
+    @staticmethod
+    def make_key(*params):
+        """Ключ кэша из параметров генерации (сид, размеры, версия и т.д.)"""
+        text = "|".join(str(param) for param in params)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def load(self, key):
+        """Открывает сохраненный лабиринт (MazeFile через mmap) или возвращает None"""
+        path = self.path(key)
+        try:
+            maze_file = open_maze(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.errors.append(f"Поврежденная запись кэша {path}: {e}")
+            return None
+
+        # Обновляем время изменения - по нему определяется порядок вытеснения
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return maze_file
+
+    def store(self, key, grid, **header):
+        """Сохраняет лабиринт и при необходимости вытесняет старые записи"""
+        os.makedirs(self.directory, exist_ok=True)
+        write_maze(self.path(key), grid, **header)
+        self.evict()
+
+    def evict(self):
+        """Удаляет самые давно использованные записи, пока кэш больше лимита"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
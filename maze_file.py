@@ -0,0 +1,151 @@
+# maze_file.py - двоичный формат лабиринта с загрузкой через mmap
+import mmap
+import os
+import struct
+from config import *
+from maze_grid import MazeGrid
+
+MAZE_FILE_MAGIC = b'MAZE'
+MAZE_FILE_VERSION = 1
+
+# Заголовок (little-endian), дополненный нулями до HEADER_SIZE байт:
+# сигнатура, версия формата, размер заголовка, ширина, высота,
+# старт (x, y), выход (x, y), сид (-1 - неизвестен), размер комнат,
+# версия генератора, флаги, бэкенд (ascii)
+HEADER_FORMAT = struct.Struct('<4sHHIIiiiiqHHH8s')
+HEADER_SIZE = 64
+
+# Флаги заголовка
+FLAG_GUARANTEED = 1  # лабиринт построен в режиме guarantee_solvable
+
+
+def pack_header(width, height, start=None, exit=None, seed=None, room_size=0,
+                generator_version=0, flags=0, backend=""):
+    """Собирает заголовок файла лабиринта"""
+    start = start or (-1, -1)
+    exit = exit or (-1, -1)
+    header = HEADER_FORMAT.pack(
+        MAZE_FILE_MAGIC, MAZE_FILE_VERSION, HEADER_SIZE, width, height,
+        start[0], start[1], exit[0], exit[1],
+        -1 if seed is None else seed, room_size, generator_version, flags,
+        backend.encode('ascii')[:8])
+    return header.ljust(HEADER_SIZE, b'\0')
+
+
+def unpack_header(data):
+    """Разбирает заголовок; возвращает словарь с полями"""
+    if len(data) < HEADER_FORMAT.size:
+        raise ValueError("Файл лабиринта слишком короткий")
+    (magic, version, header_size, width, height, start_x, start_y, exit_x, exit_y,
+     seed, room_size, generator_version, flags, backend) = HEADER_FORMAT.unpack_from(data)
+    if magic != MAZE_FILE_MAGIC:
+        raise ValueError("Это не файл лабиринта")
+    if version > MAZE_FILE_VERSION:
+        raise ValueError(f"Неподдерживаемая версия формата лабиринта: {version}")
+    return {
+        "version": version,
+        "header_size": header_size,
+        "width": width,
+        "height": height,
+        "start": (start_x, start_y) if start_x >= 0 else None,
+        "exit": (exit_x, exit_y) if exit_x >= 0 else None,
+        "seed": None if seed < 0 else seed,
+        "room_size": room_size,
+        "generator_version": generator_version,
+        "flags": flags,
+        "backend": backend.rstrip(b'\0').decode('ascii'),
+    }
+
+
+def write_maze(path, grid, **header):
+    """Записывает MazeGrid в файл: заголовок + массив клеток по байту на клетку"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(pack_header(grid.width, grid.height, **header))
+        f.write(grid.cells)
+    # Атомарная замена: читатели никогда не увидят недописанный файл
+    os.replace(temp_path, path)
+
+
+def write_maze_rows(path, width, height, rows, **header):
+    """Записывает лабиринт построчно: rows - итератор строк клеток по width байт.
+
+    В памяти одновременно находится только одна строка, поэтому так можно
+    сохранять лабиринты, которые целиком в память не помещаются.
+    """
+    temp_path = path + ".tmp"
+    written = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(pack_header(width, height, **header))
+            for row in rows:
+                if len(row) != width:
+                    raise ValueError(f"Строка {written} длины {len(row)} вместо {width}")
+                f.write(row)
+                written += 1
+        if written != height:
+            raise ValueError(f"Записано {written} строк вместо {height}")
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+
+
+class MazeFile:
+    """Файл лабиринта, отображенный в память; grid ссылается на mmap без копирования"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        try:
+            self.header = unpack_header(self._mmap)
+            width, height = self.header["width"], self.header["height"]
+            offset = self.header["header_size"]
+            if len(self._mmap) < offset + width * height:
+                raise ValueError(f"Файл лабиринта {path} обрезан")
+        except Exception:
+            self._mmap.close()
+            self._file.close()
+            raise
+
+        self._view = memoryview(self._mmap)
+        self._cells = self._view[offset:offset + width * height]
+        self.grid = MazeGrid(width, height, self._cells)
+
+    @property
+    def start(self):
+        return self.header["start"]
+
+    @property
+    def exit(self):
+        return self.header["exit"]
+
+    @property
+    def seed(self):
+        return self.header["seed"]
+
+    def close(self):
+        """Освобождает отображение; grid после этого использовать нельзя"""
+        self.grid = None
+        for view in (getattr(self, '_cells', None), getattr(self, '_view', None)):
+            if view is not None:
+                view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_maze(path):
+    """Открывает файл лабиринта через mmap"""
+    return MazeFile(path)
@@ -1,14 +1,92 @@
 # maze_generator.py - исправленная версия с увеличенным количеством попыток
+import multiprocessing
 import random
+import re
+import time
+from array import array
+from bisect import bisect_right
 from config import *
+from disjoint_set import DisjointSet
+from maze_algorithms import ALGORITHMS
+from maze_file import FLAG_GUARANTEED, open_maze, write_maze
+from maze_grid import MazeGrid, SYMBOL_TO_CELL
+from maze_stats import GenerationStats
+
+# NumPy - необязательная зависимость, нужна только для бэкенда "numpy"
+try:
+    import maze_numpy
+except ImportError:
+    maze_numpy = None
+
+# Доступные бэкенды генерации
+BACKENDS = ("python", "numpy")
+
+# Версия алгоритма генерации: меняется, когда один и тот же сид начинает давать
+# другой лабиринт (входит в ключ кэша)
+GENERATOR_VERSION = 4
+
+# Сид хранится в заголовке файла лабиринта как int64, -1 там означает "нет сида"
+MAX_SEED = (1 << 63) - 1
+
+# Горизонтальный отрезок открытых клеток в строке лабиринта
+OPEN_RUN = re.compile(f"[^{re.escape(WALL_SYMBOL)}]+")
+
+def check_seed(seed):
+    """Возвращает сид, если он помещается в файл лабиринта (0..MAX_SEED), иначе ValueError"""
+    if seed is not None and not 0 <= seed <= MAX_SEED:
+        raise ValueError(f"Сид должен быть от 0 до {MAX_SEED}: {seed}")
+    return seed
+
 
 class MazeGenerator:
-    def __init__(self, width=None, height=None, room_size=None):
+    def __init__(self, width=None, height=None, room_size=None, compact=False, backend="python",
+                 guarantee_solvable=False, seed=None, cache=None, workers=1, verbose=True,
+                 trace_memory=False, algorithm="legacy", progress=None):
         # Принимаем размеры явно при создании
         self.width = width if width is not None else MAP_WIDTH
         self.height = height if height is not None else MAP_HEIGHT
         self.room_size = room_size if room_size is not None else ROOM_SIZE
+        # compact=True - готовый лабиринт хранится в MazeGrid (байт на клетку)
+        self.compact = compact
+        # backend="numpy" - случайные проходы и соединение областей выполняются пакетно
+        if backend not in BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд генерации: {backend}")
+        if backend == "numpy" and maze_numpy is None:
+            raise ImportError("Для бэкенда 'numpy' нужен установленный пакет numpy")
+        self.backend = backend
+        # algorithm - стратегия построения базового лабиринта (maze_algorithms.py)
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Неизвестный алгоритм генерации: {algorithm}")
+        self.algorithm = ALGORITHMS[algorithm]()
+        # guarantee_solvable=True - лабиринт проходим с первой попытки: выход и так
+        # ставится в достижимую от старта клетку, а если комната выхода отрезала
+        # его, старт и выход соединяются коридором (_connect_start_to_exit)
+        self.guarantee_solvable = guarantee_solvable
+        # seed=None - для каждого лабиринта выбирается новый случайный сид
+        self.seed = check_seed(seed)
+        self.maze_seed = seed
+        self.rng = random.Random(seed)
+        # cache - MazeCache для повторного открытия уже сгенерированных лабиринтов
+        self.cache = cache
+        # workers > 1 - попытки генерации выполняются в пуле процессов
+        self.workers = workers
+        # verbose=False - генерация ничего не печатает
+        self.verbose = verbose
+        # Время, пик памяти (trace_memory=True) и счетчики по фазам генерации
+        self.stats = GenerationStats(trace_memory)
+        # progress(доля, этап, попытка) - вызывается по ходу генерации (maze_background.py)
+        self.progress = progress
         self.maze = []
+        self.start_pos = None
+        self.exit_pos = None
+        self._maze_file = None  # MazeFile, если лабиринт отображен из кэша
+        # Статистика последнего вызова generate_maze()
+        self.attempts = 0
+        self.attempt_times = []
+        self.connector_cells = 0
+        # Поле BFS-расстояний от старта (y * width + x, -1 - недостижимо)
+        self.distance_field = None
+        self.exit_distance = -1
         
     def update_dimensions(self, width, height, room_size):
         """Явно обновляет размеры"""
@@ -16,8 +94,30 @@ class MazeGenerator:
         self.height = height
         self.room_size = room_size
         
+    def _log(self, message):
+        """Сообщение о ходе генерации (печатается только при verbose=True)"""
+        if self.verbose:
+            print(message)
+
+    def _report(self, fraction, stage):
+        """Сообщает о ходе текущей попытки (доля от 0 до 1)"""
+        if self.progress is not None:
+            self.progress(fraction, stage, self.attempts)
+
+    def report_carving(self, fraction):
+        """Доля вырезанного базового лабиринта - вызывается алгоритмами"""
+        if self.progress is not None:
+            self.progress(fraction * 0.6, "base_maze", self.attempts)
+
     def generate_maze(self, width=None, height=None, room_size=None):
-        """Генерирует лабиринт с проверкой проходимости"""
+        """Генерирует лабиринт с проверкой проходимости; статистика - в self.stats"""
+        self.stats.begin()
+        try:
+            return self._generate(width, height, room_size)
+        finally:
+            self.stats.end()
+
+    def _generate(self, width, height, room_size):
         # Обновляем размеры если переданы
         if width is not None:
             self.width = width
@@ -26,7 +126,17 @@ class MazeGenerator:
         if room_size is not None:
             self.room_size = room_size
             
-        print(f"Генерация лабиринта {self.width}x{self.height}...")
+        # Один и тот же сид всегда дает один и тот же лабиринт
+        self.maze_seed = self.seed if self.seed is not None else random.randrange(1 << 32)
+        self.rng.seed(self.maze_seed)
+        self._maze_file = None
+        
+        if self.cache is not None and self._timed_cache_load():
+            self._log(f"Лабиринт {self.width}x{self.height} загружен из кэша (сид {self.maze_seed})")
+            self._report(1.0, "cache_load")
+            return True
+            
+        self._log(f"Генерация лабиринта {self.width}x{self.height}...")
         
         # Увеличиваем количество попыток для сложных уровней
         if self.width >= 800:  # Сложность 5 - экстрим
@@ -38,30 +148,229 @@ class MazeGenerator:
         else:
             max_attempts = 50
             
+        self.attempts = 0
+        self.attempt_times = []
+        self.connector_cells = 0
+        
+        # С guarantee_solvable первая же попытка проходима - остальным
+        # процессам пула нечего делать
+        if self.workers > 1 and not self.guarantee_solvable:
+            return self._generate_parallel(max_attempts)
+            
         for attempt in range(max_attempts):
-            print(f"Попытка {attempt + 1}/{max_attempts}")
+            self._log(f"Попытка {attempt + 1}/{max_attempts}")
+            self.attempts = attempt + 1
+            attempt_start = time.perf_counter()
             
             try:
-                self._generate_base_maze()
+                start_pos, exit_pos, solvable = self._run_attempt(self._attempt_seed(attempt))
+            except Exception as e:
+                self.attempt_times.append(time.perf_counter() - attempt_start)
+                self._log(f"Ошибка при генерации: {e}")
+                continue
+            self.attempt_times.append(time.perf_counter() - attempt_start)
+            
+            # Принятие (и запись в кэш) - уже не часть попытки: его ошибка
+            # не должна считаться неудачной генерацией
+            if solvable:
+                self._accept(start_pos, exit_pos)
+                return True
+            self._log("Лабиринт непроходим, перегенерируем...")
+        
+        self._log("Не удалось сгенерировать проходимый лабиринт!")
+        return False
+    
+    def _attempt_seed(self, attempt):
+        """Сид отдельной попытки: попытки независимы и могут идти в любом процессе"""
+        return (self.maze_seed << 32) | attempt
+
+    def _run_attempt(self, attempt_seed):
+        """Одна попытка генерации; возвращает (старт, выход, проходим ли лабиринт)"""
+        self.rng.seed(attempt_seed)
+        stats = self.stats
+        self._report(0.0, "base_maze")
+        with stats.phase("base_maze"):
+            self.algorithm.carve(self)
+        
+        # Случайные проходы и соединение областей генерируем ДО размещения
+        # старта и выхода. Комнаты вырезаются при построении базового лабиринта:
+        # после этих проходов сетка открыта на 68-82%, и целиком каменных
+        # прямоугольников под комнату в ней уже нет
+        if self.backend == "numpy":
+            # Фазы random_paths и connect_areas замеряются внутри
+            self._report(0.6, "numpy_passes")
+            maze_numpy.run_bulk_passes(self, self.rng.getrandbits(64))
+        else:
+            self._report(0.6, "random_paths")
+            with stats.phase("random_paths"):
+                self._add_random_paths()
+            with stats.phase("connect_areas"):
+                self._connect_isolated_areas()
+        
+        self._report(0.7, "place_start")
+        with stats.phase("place_start"):
+            start_pos = self._place_player_start()
+        self._report(0.72, "place_exit")
+        with stats.phase("place_exit"):
+            exit_pos = self._place_exit(start_pos)
+        
+        # Проверка заодно строит итоговое поле расстояний от старта
+        self._report(0.82, "solvability")
+        with stats.phase("solvability"):
+            solvable = self._is_maze_solvable(start_pos, exit_pos)
+            if solvable or not self.guarantee_solvable:
+                stats.count("solvable" if solvable else "unsolvable")
+        
+        # Выход ставится в клетку, до которой дошел обход от старта, так что
+        # обычно он уже достижим. Соединять старт и выход (полный проход по
+        # сетке) нужно, только если комната выхода отрезала его центр
+        self.connector_cells = 0
+        if not solvable and self.guarantee_solvable:
+            self._report(0.88, "connect_exit")
+            with stats.phase("connect_exit"):
+                self.connector_cells = self._connect_start_to_exit(start_pos, exit_pos)
+                stats.count("connector_cells", self.connector_cells)
+            with stats.phase("solvability"):
+                solvable = self._is_maze_solvable(start_pos, exit_pos)
+                stats.count("solvable" if solvable else "unsolvable")
+        return start_pos, exit_pos, solvable
+
+    def _accept(self, start_pos, exit_pos):
+        """Делает результат удачной попытки текущим лабиринтом"""
+        self.start_pos = start_pos
+        self.exit_pos = exit_pos
+        if self.compact and not isinstance(self.maze, MazeGrid):
+            self.maze = MazeGrid.from_rows(self.maze)
+        elif not self.compact and isinstance(self.maze, MazeGrid):
+            self.maze = self.maze.to_rows()
+        if self.cache is not None:
+            self._store_in_cache()
+        self._report(1.0, "done")
+        self._log(f"Лабиринт {self.width}x{self.height} сгенерирован успешно!")
+
+    def _generate_parallel(self, max_attempts):
+        """Попытки в пуле процессов; побеждает первая проходимая по номеру попытки.
+
+        Результат не зависит от числа процессов и от того, какая попытка
+        закончилась раньше: тот же сид дает тот же лабиринт, что и без пула.
+        """
+        params = (self.width, self.height, self.room_size, self.backend, self.guarantee_solvable,
+                  self.stats.trace_memory, self.algorithm.name)
+        self._log(f"Попытки выполняются параллельно в {self.workers} процессах")
+        
+        pool = multiprocessing.Pool(self.workers)
+        futures = {}
+        next_attempt = 0
+        try:
+            for attempt in range(max_attempts):
+                # Держим в работе по одной попытке на процесс
+                while next_attempt < max_attempts and next_attempt < attempt + self.workers:
+                    futures[next_attempt] = pool.apply_async(
+                        _run_attempt_in_worker, (params, self._attempt_seed(next_attempt)))
+                    next_attempt += 1
                 
-                # Генерируем комнаты ДО размещения старта и выхода
-                self._generate_rooms_during_maze()
+                self.attempts = attempt + 1
+                self._report(0.0, "parallel")
+                try:
+                    result = futures.pop(attempt).get()
+                except Exception as e:
+                    self.attempt_times.append(0.0)
+                    self._log(f"Ошибка при генерации (попытка {attempt + 1}): {e}")
+                    continue
                 
-                start_pos = self._place_player_start()
-                exit_pos = self._place_exit()
+                cells, start_pos, exit_pos, solvable, connector_cells, distance_field, \
+                    exit_distance, elapsed, phases = result
+                self.attempt_times.append(elapsed)
+                self.stats.merge(phases)
+                if not solvable:
+                    self._log(f"Попытка {attempt + 1}: лабиринт непроходим")
+                    continue
                 
-                if self._is_maze_solvable(start_pos, exit_pos):
-                    print(f"Лабиринт {self.width}x{self.height} сгенерирован успешно!")
-                    return True
-                else:
-                    print("Лабиринт непроходим, перегенерируем...")
-            except Exception as e:
-                print(f"Ошибка при генерации: {e}")
-                continue
+                self.maze = MazeGrid(self.width, self.height, bytearray(cells))
+                self.connector_cells = connector_cells
+                self.distance_field = distance_field
+                self.exit_distance = exit_distance
+                self._accept(start_pos, exit_pos)
+                return True
+        finally:
+            # Попытки после победившей не нужны: процессы останавливаются сразу,
+            # а не дорабатывают в фоне, отнимая процессор у игры
+            pool.terminate()
+            pool.join()
         
-        print("Не удалось сгенерировать проходимый лабиринт!")
+        self._log("Не удалось сгенерировать проходимый лабиринт!")
         return False
     
+    def cache_key(self):
+        """Ключ кэша: все, от чего зависит результат генерации"""
+        return self.cache.make_key(self.maze_seed, self.width, self.height, self.room_size,
+                                   GENERATOR_VERSION, self.backend, self.guarantee_solvable,
+                                   self.algorithm.name)
+
+    def _timed_cache_load(self):
+        with self.stats.phase("cache_load"):
+            loaded = self._load_from_cache()
+            self.stats.count("hits" if loaded else "misses")
+        return loaded
+
+    def _load_from_cache(self):
+        """Загружает лабиринт из кэша; поле расстояний строится при первом запросе"""
+        maze_file = self.cache.load(self.cache_key())
+        if maze_file is None:
+            return False
+        self._use_maze_file(maze_file)
+        return True
+
+    def load_file(self, path):
+        """Открывает лабиринт из двоичного файла (например, от maze_stream.py)"""
+        maze_file = open_maze(path)
+        self.width = maze_file.grid.width
+        self.height = maze_file.grid.height
+        self.maze_seed = maze_file.seed
+        self._use_maze_file(maze_file)
+
+    def _use_maze_file(self, maze_file):
+        """Делает лабиринт из MazeFile текущим; поле расстояний строится по запросу"""
+        if self.compact:
+            # Сетка ссылается прямо на отображенный в память файл
+            self._maze_file = maze_file
+            self.maze = maze_file.grid
+        else:
+            self.maze = maze_file.grid.to_rows()
+            maze_file.close()
+        self.start_pos = maze_file.start
+        self.exit_pos = maze_file.exit
+        self.attempts = 0
+        self.attempt_times = []
+        self.connector_cells = 0
+        self.distance_field = None
+        self.exit_distance = -1
+
+    def _file_header(self):
+        """Поля заголовка двоичного файла лабиринта"""
+        return {
+            "start": self.start_pos,
+            "exit": self.exit_pos,
+            "seed": self.maze_seed,
+            "room_size": self.room_size,
+            "generator_version": GENERATOR_VERSION,
+            "flags": FLAG_GUARANTEED if self.guarantee_solvable else 0,
+            "backend": self.backend,
+        }
+
+    def _store_in_cache(self):
+        """Сохраняет готовый лабиринт в кэш"""
+        grid = self.maze if isinstance(self.maze, MazeGrid) else MazeGrid.from_rows(self.maze)
+        try:
+            self.cache.store(self.cache_key(), grid, **self._file_header())
+        except OSError as e:
+            self._log(f"Не удалось сохранить лабиринт в кэш: {e}")
+
+    def save_to_file(self, path):
+        """Сохраняет готовый лабиринт в двоичном формате (см. maze_file.py)"""
+        grid = self.maze if isinstance(self.maze, MazeGrid) else MazeGrid.from_rows(self.maze)
+        write_maze(path, grid, **self._file_header())
+
     def _generate_base_maze(self):
         """Генерирует базовую структуру лабиринта с оптимизацией для больших размеров"""
         # Инициализируем карту стенами
@@ -71,8 +380,9 @@ class MazeGenerator:
         if self.width >= 800:  # Сложность 5 - экстрим
             step_size = 3
             room_generation_interval = self.width // 25
-            corridor_width = random.randint(2, 3)
-            max_empty_around = 8
+            corridor_width = self.rng.randint(2, 3)
+            # Поворот коридора шириной 3 видит 10 пустых клеток в окне 5x5
+            max_empty_around = 8 if corridor_width == 2 else 10
         elif self.width >= 400:  # Сложность 4 - хардкор (как экстрим)
             step_size = 3
             room_generation_interval = self.width // 20
@@ -118,10 +428,12 @@ class MazeGenerator:
             
             # Увеличиваем счетчик шагов
             step_count += 1
+            if step_count & 1023 == 0:
+                self.report_carving(step_count / max_steps)
             
             # Проверяем, не пора ли генерировать комнату
             if step_count % room_generation_interval == 0:
-                if random.random() < 0.5:  # Увеличиваем шанс генерации комнаты
+                if self.rng.random() < 0.5:  # Увеличиваем шанс генерации комнаты
                     self._try_generate_random_room()
             
             # Получаем возможные направления
@@ -149,7 +461,7 @@ class MazeGenerator:
                         directions.append((dx, dy, nx, ny))
             
             if directions:
-                dx, dy, next_x, next_y = random.choice(directions)
+                dx, dy, next_x, next_y = self.rng.choice(directions)
                 
                 # Создаем коридор с учетом ширины
                 if corridor_width > 1:
@@ -176,11 +488,7 @@ class MazeGenerator:
             else:
                 stack.pop()
         
-        # Добавляем больше случайных проходов для увеличения связности
-        self._add_random_paths()
-        
-        # Дополнительно: соединяем изолированные области
-        self._connect_isolated_areas()
+        self.stats.count("dfs_steps", step_count)
     
     def _connect_isolated_areas(self):
         """Соединяет изолированные области лабиринта"""
@@ -191,9 +499,10 @@ class MazeGenerator:
         else:
             connection_attempts = self.width * self.height // 300
             
+        carved = 0
         for _ in range(connection_attempts):
-            x = random.randint(2, self.width - 3)
-            y = random.randint(2, self.height - 3)
+            x = self.rng.randint(2, self.width - 3)
+            y = self.rng.randint(2, self.height - 3)
             
             if self.maze[y][x] == WALL_SYMBOL:
                 # Более простая проверка для сложных уровней
@@ -207,6 +516,10 @@ class MazeGenerator:
                 # Если есть хотя бы 2 пустые клетки вокруг, убираем стену
                 if empty_count >= 2:
                     self.maze[y][x] = EMPTY_SYMBOL
+                    carved += 1
+        
+        self.stats.count("tried", connection_attempts)
+        self.stats.count("carved", carved)
     
     def _try_generate_random_room(self):
         """Пытается сгенерировать случайную комнату с оптимизацией"""
@@ -217,70 +530,36 @@ class MazeGenerator:
             attempts += 1
             
             # Случайная позиция для комнаты
-            room_x = random.randint(2, self.width - self.room_size - 2)
-            room_y = random.randint(2, self.height - self.room_size - 2)
+            room_x = self.rng.randint(2, self.width - self.room_size - 2)
+            room_y = self.rng.randint(2, self.height - self.room_size - 2)
             
             # Упрощенная проверка для сложных уровней
             if self._can_place_room_simple(room_x, room_y, self.room_size):
                 self._create_room(room_x, room_y, self.room_size)
+                self.stats.count("rooms_tried", attempts)
+                self.stats.count("rooms_created")
                 return True
         
+        self.stats.count("rooms_tried", attempts)
         return False
     
-    def _generate_rooms_during_maze(self):
-        """Дополнительная генерация комнат после создания базового лабиринта"""
-        # Увеличиваем количество комнат для больших лабиринтов
-        if self.width >= 400:
-            additional_rooms = max(15, self.width * self.height // 1500)
-        elif self.width >= 200:
-            additional_rooms = max(12, self.width * self.height // 1200)
-        else:
-            additional_rooms = max(10, self.width * self.height // 1000)
-            
-        rooms_created = 0
-        attempts = 0
-        max_attempts = additional_rooms * 20  # Увеличиваем максимальное количество попыток
-        
-        while rooms_created < additional_rooms and attempts < max_attempts:
-            attempts += 1
-            
-            # Случайная позиция для комнаты
-            room_x = random.randint(2, self.width - self.room_size - 2)
-            room_y = random.randint(2, self.height - self.room_size - 2)
-            
-            # Упрощенная проверка для сложных уровней
-            if self._can_place_room_simple(room_x, room_y, self.room_size):
-                self._create_room(room_x, room_y, self.room_size)
-                rooms_created += 1
-    
+    def _room_in_bounds(self, x, y, size):
+        """Проверяет, что комната не подходит к краю карты ближе чем на 2 клетки"""
+        return not (x < 2 or x + size >= self.width - 2 or y < 2 or y + size >= self.height - 2)
+
     def _can_place_room_simple(self, x, y, size):
-        """Упрощенная проверка возможности размещения комнаты"""
-        # Проверяем границы
-        if x < 2 or x + size >= self.width - 2 or y < 2 or y + size >= self.height - 2:
+        """Точная проверка: вся область комнаты - стены.
+
+        Читается сама сетка, поэтому проверка всегда видит то, что уже
+        вырезал DFS; строка области проверяется одним срезом, и первая же
+        строка с проходом прекращает проверку.
+        """
+        if not self._room_in_bounds(x, y, size):
             return False
-        
-        # Упрощенная проверка для сложных уровней - проверяем только углы
-        if self.width >= 200:
-            # Проверяем только углы и центр
-            check_points = [
-                (x, y), (x + size - 1, y),
-                (x, y + size - 1), (x + size - 1, y + size - 1),
-                (x + size // 2, y + size // 2)
-            ]
-            
-            for px, py in check_points:
-                if (0 <= px < self.width and 0 <= py < self.height and
-                    self.maze[py][px] != WALL_SYMBOL):
-                    return False
-            return True
-        else:
-            # Для маленьких лабиринтов проверяем всю область
-            for room_y in range(y, y + size):
-                for room_x in range(x, x + size):
-                    if (0 <= room_x < self.width and 0 <= room_y < self.height and
-                        self.maze[room_y][room_x] != WALL_SYMBOL):
-                        return False
-            return True
+        for row in self.maze[y:y + size]:
+            if row[x:x + size].count(WALL_SYMBOL) != size:
+                return False
+        return True
     
     def _create_room(self, x, y, size):
         """Создает комнату заданного размера"""
@@ -292,17 +571,17 @@ class MazeGenerator:
         
         # Меньше стен в комнатах для больших лабиринтов
         if self.width >= 200:
-            num_walls = random.randint(0, max(0, size // 6))  # Еще меньше стен
+            num_walls = self.rng.randint(0, max(0, size // 6))  # Еще меньше стен
         else:
-            num_walls = random.randint(0, 1)
+            num_walls = self.rng.randint(0, 1)
             
         walls_placed = 0
         attempts = 0
         
         while walls_placed < num_walls and attempts < 5:
             attempts += 1
-            wall_x = random.randint(x + 1, x + size - 2)
-            wall_y = random.randint(y + 1, y + size - 2)
+            wall_x = self.rng.randint(x + 1, x + size - 2)
+            wall_y = self.rng.randint(y + 1, y + size - 2)
             
             # Проверяем, что не ставим стену на проход
             if self.maze[wall_y][wall_x] == EMPTY_SYMBOL:
@@ -311,15 +590,15 @@ class MazeGenerator:
         
         # Создаем проходы из комнаты (увеличиваем количество проходов)
         if self.width >= 200:
-            num_exits = random.randint(3, min(6, size - 1))  # Еще больше проходов
+            num_exits = self.rng.randint(3, min(6, size - 1))  # Еще больше проходов
         else:
-            num_exits = random.randint(2, 4)
+            num_exits = self.rng.randint(2, 4)
             
         exits_created = 0
         exit_attempts = 0
         
         sides = ['top', 'bottom', 'left', 'right']
-        random.shuffle(sides)
+        self.rng.shuffle(sides)
         
         for side in sides:
             if exits_created >= num_exits or exit_attempts >= 25:
@@ -329,7 +608,7 @@ class MazeGenerator:
             
             if side == 'top' and y > 1:
                 for _ in range(2):  # Пробуем несколько позиций
-                    exit_x = random.randint(x + 1, x + size - 2)
+                    exit_x = self.rng.randint(x + 1, x + size - 2)
                     if (0 <= exit_x < self.width and y - 1 >= 0 and
                         self.maze[y - 1][exit_x] == WALL_SYMBOL):
                         self.maze[y - 1][exit_x] = EMPTY_SYMBOL
@@ -338,7 +617,7 @@ class MazeGenerator:
                     
             elif side == 'bottom' and y + size < self.height - 1:
                 for _ in range(2):
-                    exit_x = random.randint(x + 1, x + size - 2)
+                    exit_x = self.rng.randint(x + 1, x + size - 2)
                     if (0 <= exit_x < self.width and y + size < self.height and
                         self.maze[y + size][exit_x] == WALL_SYMBOL):
                         self.maze[y + size][exit_x] = EMPTY_SYMBOL
@@ -347,7 +626,7 @@ class MazeGenerator:
                     
             elif side == 'left' and x > 1:
                 for _ in range(2):
-                    exit_y = random.randint(y + 1, y + size - 2)
+                    exit_y = self.rng.randint(y + 1, y + size - 2)
                     if (0 <= exit_y < self.height and x - 1 >= 0 and
                         self.maze[exit_y][x - 1] == WALL_SYMBOL):
                         self.maze[exit_y][x - 1] = EMPTY_SYMBOL
@@ -356,7 +635,7 @@ class MazeGenerator:
                     
             elif side == 'right' and x + size < self.width - 1:
                 for _ in range(2):
-                    exit_y = random.randint(y + 1, y + size - 2)
+                    exit_y = self.rng.randint(y + 1, y + size - 2)
                     if (0 <= exit_y < self.height and x + size < self.width and
                         self.maze[exit_y][x + size] == WALL_SYMBOL):
                         self.maze[exit_y][x + size] = EMPTY_SYMBOL
@@ -372,9 +651,10 @@ class MazeGenerator:
         else:
             extra_paths = self.width * self.height // 40
             
+        carved = 0
         for _ in range(extra_paths):
-            x = random.randint(1, self.width - 2)
-            y = random.randint(1, self.height - 2)
+            x = self.rng.randint(1, self.width - 2)
+            y = self.rng.randint(1, self.height - 2)
             
             if self.maze[y][x] == WALL_SYMBOL:
                 empty_around = False
@@ -387,6 +667,10 @@ class MazeGenerator:
                 
                 if empty_around:
                     self.maze[y][x] = EMPTY_SYMBOL
+                    carved += 1
+        
+        self.stats.count("tried", extra_paths)
+        self.stats.count("carved", carved)
 
     # Остальные методы остаются без значительных изменений, но с оптимизацией
     def _place_player_start(self):
@@ -415,97 +699,195 @@ class MazeGenerator:
         self.maze[start_room_center[1]][start_room_center[0]] = PLAYER_START_SYMBOL
         return start_room_center
 
-    def _place_exit(self):
-        """Размещает выход в комнате как можно дальше от старта"""
-        start_pos = None
-        for y in range(min(200, self.height)):
-            for x in range(min(200, self.width)):
-                if self.maze[y][x] == PLAYER_START_SYMBOL:
-                    start_pos = (x, y)
+    def _place_exit(self, start_pos=None):
+        """Размещает выход в комнате в самой дальней по проходам точке от старта"""
+        if not start_pos:
+            for y in range(min(200, self.height)):
+                for x in range(min(200, self.width)):
+                    if self.maze[y][x] == PLAYER_START_SYMBOL:
+                        start_pos = (x, y)
+                        break
+                if start_pos:
                     break
-            if start_pos:
-                break
         
         if not start_pos:
             start_pos = (self.width // 10, self.height // 10)
         
-        max_distance = 0
         exit_pos = start_pos
         
-        search_step = 3 if self.width >= 400 else 2 if self.width >= 200 else 1
-        
-        # Ищем самую дальнюю точку
-        for y in range(3, self.height - 3, search_step):
-            for x in range(3, self.width - 3, search_step):
-                if self.maze[y][x] == EMPTY_SYMBOL:
-                    distance = abs(x - start_pos[0]) + abs(y - start_pos[1])
-                    if distance > max_distance:
-                        max_distance = distance
-                        exit_pos = (x, y)
+        # Клетки в порядке обхода в ширину, т.е. по возрастанию расстояния:
+        # берем самую дальнюю, вокруг которой помещается комната выхода
+        width = self.width + 1
+        distances, order = self._bfs_from(start_pos, keep_order=True)
+        self.stats.count("bfs_cells", len(order))
+        for index in reversed(order):
+            x = index % width
+            y = index // width - 1
+            if not (3 <= x < self.width - 3 and 3 <= y < self.height - 3):
+                continue
+            if exit_pos == start_pos:
+                exit_pos = (x, y)  # запасной вариант - самая дальняя клетка
+            if self._exit_room_keeps_distance(distances, x, y):
+                exit_pos = (x, y)
+                break
         
         exit_room_center = self._create_exit_room(exit_pos[0], exit_pos[1])
         self.maze[exit_room_center[1]][exit_room_center[0]] = EXIT_SYMBOL
         return exit_room_center
 
+    def _exit_room_keeps_distance(self, distances, x, y):
+        """Проверяет, что комната выхода вокруг (x, y) не откроет короткий путь к старту"""
+        # Комната (с дверями и клетками за ними) не должна касаться клеток,
+        # которые заметно ближе к старту, чем сама точка
+        room_size = self.room_size
+        width = self.width + 1
+        room_x = min(max(2, x - room_size // 2), self.width - room_size - 2)
+        room_y = min(max(2, y - room_size // 2), self.height - room_size - 2)
+        min_distance = distances[(y + 1) * width + x] - 2 * (room_size + 2)
+        
+        for check_y in range(max(0, room_y - 2), min(self.height, room_y + room_size + 2)):
+            offset = (check_y + 1) * width
+            for check_x in range(max(0, room_x - 2), min(self.width, room_x + room_size + 2)):
+                if 0 <= distances[offset + check_x] < min_distance:
+                    return False
+        return True
+
     def _is_maze_solvable(self, start_pos, exit_pos):
-        """Проверяет, можно ли пройти от старта до выхода с оптимизацией"""
+        """Точно проверяет проходимость и сохраняет поле расстояний от старта"""
+        self.distance_field = None
+        self.exit_distance = -1
         if not start_pos or not exit_pos:
             return False
         
-        # Для больших лабиринтов используем упрощенную проверку
-        if self.width >= 200:
-            return self._quick_solvability_check(start_pos, exit_pos)
+        distances, _ = self._bfs_from(start_pos)
         
-        visited = [[False for _ in range(self.width)] for _ in range(self.height)]
-        stack = [start_pos]
-        visited[start_pos[1]][start_pos[0]] = True
+        # Сохраняем поле без рамки: индекс y * width + x
+        width = self.width
+        field = array('i')
+        for y in range(self.height):
+            offset = (y + 1) * (width + 1)
+            field.extend(distances[offset:offset + width])
+        self.distance_field = field
+        self.exit_distance = field[exit_pos[1] * width + exit_pos[0]]
+        self.stats.count("exit_distance", max(self.exit_distance, 0))
+        return self.exit_distance >= 0
+
+    def _bfs_from(self, start_pos, keep_order=False):
+        """Обход в ширину по плоской сетке с рамкой: (расстояния, клетки в порядке обхода).
+
+        Порядок обхода нужен только для выбора места выхода, поэтому без
+        keep_order вместо него возвращается None: в памяти остаются лишь
+        расстояния и текущий фронт обхода.
+        """
+        width = self.width + 1
+        cells = self._padded_cells()
+        distances = array('i', [-1]) * len(cells)
+        start = (start_pos[1] + 1) * width + start_pos[0]
+        if cells[start] == CELL_WALL:
+            return distances, [] if keep_order else None
+        
+        # Посещенные клетки помечаем стеной прямо в копии - отдельный visited не нужен,
+        # а рамка из стен избавляет от проверок границ
+        cells[start] = CELL_WALL
+        distances[start] = 0
+        order = [start] if keep_order else None
+        frontier = [start]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for index in frontier:
+                for neighbor in (index + 1, index - 1, index + width, index - width):
+                    if cells[neighbor] != CELL_WALL:
+                        cells[neighbor] = CELL_WALL
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+            if keep_order:
+                order.extend(next_frontier)
+            frontier = next_frontier
         
-        max_steps = min(300000, self.width * self.height // 2)
+        return distances, order
+
+    def _padded_cells(self):
+        """Плоская копия лабиринта в кодах клеток с рамкой из стен справа, сверху и снизу"""
+        if isinstance(self.maze, MazeGrid):
+            cells = self.maze.cells
+            wall = bytes([CELL_WALL])
+            rows = [cells[y * self.width:(y + 1) * self.width] for y in range(self.height)]
+            border = wall * (self.width + 1)
+            return bytearray(border + wall.join(rows) + wall + border)
+        
+        border = WALL_SYMBOL * (self.width + 1)
+        text = "".join(["".join(row) + WALL_SYMBOL for row in self.maze])
+        return bytearray((border + text + border).encode('ascii').translate(SYMBOL_TO_CELL))
+
+    def _connect_start_to_exit(self, start_pos, exit_pos):
+        """Соединяет область выхода с областью старта, возвращает число вырезанных клеток"""
+        # Связность отслеживаем через union-find по горизонтальным отрезкам
+        # открытых клеток: отрезки соседних строк объединяются при перекрытии
+        regions = DisjointSet()
+        runs = []  # для каждой строки: (начала, концы, номера отрезков)
+        prev_starts, prev_ends, prev_ids = [], [], []
         
-        steps = 0
-        while stack and steps < max_steps:
-            x, y = stack.pop()
-            steps += 1
+        for row in self.maze:
+            starts, ends, ids = [], [], []
+            for match in OPEN_RUN.finditer("".join(row)):
+                starts.append(match.start())
+                ends.append(match.end())
+                ids.append(regions.add())
             
-            if (x, y) == exit_pos:
-                return True
+            # Объединяем с перекрывающимися отрезками предыдущей строки
+            i = j = 0
+            while i < len(starts) and j < len(prev_starts):
+                if starts[i] < prev_ends[j] and prev_starts[j] < ends[i]:
+                    regions.union(ids[i], prev_ids[j])
+                if ends[i] < prev_ends[j]:
+                    i += 1
+                else:
+                    j += 1
             
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                if (0 <= nx < self.width and 0 <= ny < self.height and
-                    not visited[ny][nx] and 
-                    self.maze[ny][nx] in (EMPTY_SYMBOL, EXIT_SYMBOL, PLAYER_START_SYMBOL)):
-                    visited[ny][nx] = True
-                    stack.append((nx, ny))
+            runs.append((starts, ends, ids))
+            prev_starts, prev_ends, prev_ids = starts, ends, ids
         
-        return False
-
-    def _quick_solvability_check(self, start_pos, exit_pos):
-        """Быстрая проверка проходимости для больших лабиринтов"""
-        visited = set()
-        stack = [start_pos]
-        visited.add(start_pos)
+        def region_at(x, y):
+            starts, ends, ids = runs[y]
+            k = bisect_right(starts, x) - 1
+            if k >= 0 and x < ends[k]:
+                return ids[k]
+            return None
         
-        max_steps = 200000  # Увеличиваем максимальное количество шагов
+        start_region = region_at(*start_pos)
+        x, y = exit_pos
+        carved = 0
         
-        steps = 0
-        while stack and steps < max_steps:
-            x, y = stack.pop()
-            steps += 1
+        # Прокладываем проход от выхода к старту, пока области не сольются
+        while regions.find(region_at(x, y)) != regions.find(start_region):
+            dx = start_pos[0] - x
+            dy = start_pos[1] - y
+            if dx and (not dy or self.rng.random() < abs(dx) / (abs(dx) + abs(dy))):
+                x += 1 if dx > 0 else -1
+            else:
+                y += 1 if dy > 0 else -1
             
-            # Более либеральная проверка достижения выхода
-            if (x, y) == exit_pos or (abs(x - exit_pos[0]) + abs(y - exit_pos[1])) < 25:
-                return True
+            current = region_at(x, y)
+            if current is None:
+                # Вырезаем стену и добавляем клетку как новый отрезок
+                self.maze[y][x] = EMPTY_SYMBOL
+                carved += 1
+                current = regions.add()
+                starts, ends, ids = runs[y]
+                k = bisect_right(starts, x)
+                starts.insert(k, x)
+                ends.insert(k, x + 1)
+                ids.insert(k, current)
             
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                if (0 <= nx < self.width and 0 <= ny < self.height and
-                    (nx, ny) not in visited and
-                    self.maze[ny][nx] in (EMPTY_SYMBOL, EXIT_SYMBOL, PLAYER_START_SYMBOL)):
-                    visited.add((nx, ny))
-                    stack.append((nx, ny))
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if 0 <= nx < self.width and 0 <= ny < self.height:
+                    neighbor = region_at(nx, ny)
+                    if neighbor is not None:
+                        regions.union(current, neighbor)
         
-        return False
+        return carved
 
     # Остальные методы без изменений
     def _count_empty_around(self, x, y):
@@ -568,19 +950,19 @@ class MazeGenerator:
                     self.maze[room_y][room_x] = EMPTY_SYMBOL
         
         # Меньше стен в комнате выхода
-        num_walls = random.randint(0, 1)
+        num_walls = self.rng.randint(0, 1)
         for _ in range(num_walls):
-            wall_x = random.randint(start_x + 1, start_x + room_size - 2)
-            wall_y = random.randint(start_y + 1, start_y + room_size - 2)
+            wall_x = self.rng.randint(start_x + 1, start_x + room_size - 2)
+            wall_y = self.rng.randint(start_y + 1, start_y + room_size - 2)
             if 0 <= wall_x < self.width and 0 <= wall_y < self.height:
                 self.maze[wall_y][wall_x] = WALL_SYMBOL
         
         # Больше выходов из комнаты выхода
-        num_exits = random.randint(3, 5)
+        num_exits = self.rng.randint(3, 5)
         exits_created = 0
         
         sides = ['top', 'bottom', 'left', 'right']
-        random.shuffle(sides)
+        self.rng.shuffle(sides)
         
         for side in sides:
             if exits_created >= num_exits:
@@ -588,7 +970,7 @@ class MazeGenerator:
                 
             if side == 'top' and start_y > 1:
                 for _ in range(2):
-                    exit_x = random.randint(start_x + 1, start_x + room_size - 2)
+                    exit_x = self.rng.randint(start_x + 1, start_x + room_size - 2)
                     if (0 <= exit_x < self.width and start_y - 1 >= 0 and
                         self.maze[start_y - 1][exit_x] == WALL_SYMBOL):
                         self.maze[start_y - 1][exit_x] = EMPTY_SYMBOL
@@ -596,7 +978,7 @@ class MazeGenerator:
                         break
             elif side == 'bottom' and start_y + room_size < self.height - 1:
                 for _ in range(2):
-                    exit_x = random.randint(start_x + 1, start_x + room_size - 2)
+                    exit_x = self.rng.randint(start_x + 1, start_x + room_size - 2)
                     if (0 <= exit_x < self.width and start_y + room_size < self.height and
                         self.maze[start_y + room_size][exit_x] == WALL_SYMBOL):
                         self.maze[start_y + room_size][exit_x] = EMPTY_SYMBOL
@@ -604,7 +986,7 @@ class MazeGenerator:
                         break
             elif side == 'left' and start_x > 1:
                 for _ in range(2):
-                    exit_y = random.randint(start_y + 1, start_y + room_size - 2)
+                    exit_y = self.rng.randint(start_y + 1, start_y + room_size - 2)
                     if (0 <= exit_y < self.height and start_x - 1 >= 0 and
                         self.maze[exit_y][start_x - 1] == WALL_SYMBOL):
                         self.maze[exit_y][start_x - 1] = EMPTY_SYMBOL
@@ -612,7 +994,7 @@ class MazeGenerator:
                         break
             elif side == 'right' and start_x + room_size < self.width - 1:
                 for _ in range(2):
-                    exit_y = random.randint(start_y + 1, start_y + room_size - 2)
+                    exit_y = self.rng.randint(start_y + 1, start_y + room_size - 2)
                     if (0 <= exit_y < self.height and start_x + room_size < self.width and
                         self.maze[exit_y][start_x + room_size] == WALL_SYMBOL):
                         self.maze[exit_y][start_x + room_size] = EMPTY_SYMBOL
@@ -624,9 +1006,36 @@ class MazeGenerator:
     def get_maze(self):
         return self.maze
 
+    def get_distance_field(self):
+        """Поле BFS-расстояний от старта для готового лабиринта (или None)"""
+        if self.distance_field is None and self.start_pos and self.exit_pos:
+            self._is_maze_solvable(self.start_pos, self.exit_pos)
+        return self.distance_field
+
     def get_maze_string(self):
         """Возвращает текстовое представление всего лабиринта"""
-        maze_str = f"Размер лабиринта: {len(self.maze[0])}x{len(self.maze)}\n"
-        for row in self.maze:
-            maze_str += "".join(row) + "\n"
-        return maze_str
\ No newline at end of file
+        lines = [f"Размер лабиринта: {len(self.maze[0])}x{len(self.maze)}"]
+        lines.extend("".join(row) for row in self.maze)
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _run_attempt_in_worker(params, attempt_seed):
+    """Попытка генерации в процессе пула; лабиринт возвращается байтами клеток"""
+    width, height, room_size, backend, guarantee_solvable, trace_memory, algorithm = params
+    generator = MazeGenerator(width, height, room_size, backend=backend,
+                              guarantee_solvable=guarantee_solvable, verbose=False,
+                              trace_memory=trace_memory, algorithm=algorithm)
+    generator.stats.begin()
+    attempt_start = time.perf_counter()
+    try:
+        start_pos, exit_pos, solvable = generator._run_attempt(attempt_seed)
+    finally:
+        generator.stats.end()
+    elapsed = time.perf_counter() - attempt_start
+    phases = generator.stats.phases
+    if not solvable:
+        return None, start_pos, exit_pos, False, 0, None, -1, elapsed, phases
+    cells = bytes(MazeGrid.from_rows(generator.maze).cells)
+    return (cells, start_pos, exit_pos, True, generator.connector_cells,
+            generator.distance_field, generator.exit_distance, elapsed, phases)
\ No newline at end of file
@@ -0,0 +1,116 @@
+# maze_grid.py - компактное хранение лабиринта (один байт на клетку)
+from config import *
+
+# Таблицы перевода символ <-> код клетки
+SYMBOL_TO_CELL = bytearray([CELL_EMPTY] * 256)
+SYMBOL_TO_CELL[ord(WALL_SYMBOL)] = CELL_WALL
+SYMBOL_TO_CELL[ord(PLAYER_START_SYMBOL)] = CELL_START
+SYMBOL_TO_CELL[ord(EXIT_SYMBOL)] = CELL_EXIT
+SYMBOL_TO_CELL = bytes(SYMBOL_TO_CELL)
+
+CELL_TO_SYMBOL = bytearray(b' ' * 256)
+CELL_TO_SYMBOL[CELL_EMPTY] = ord(EMPTY_SYMBOL)
+CELL_TO_SYMBOL[CELL_WALL] = ord(WALL_SYMBOL)
+CELL_TO_SYMBOL[CELL_START] = ord(PLAYER_START_SYMBOL)
+CELL_TO_SYMBOL[CELL_EXIT] = ord(EXIT_SYMBOL)
+CELL_TO_SYMBOL = bytes(CELL_TO_SYMBOL)
+
+# Символ для каждого кода (для быстрого доступа из MazeRow)
+CELL_SYMBOLS = (EMPTY_SYMBOL, WALL_SYMBOL, PLAYER_START_SYMBOL, EXIT_SYMBOL)
+
+
+class MazeRow:
+    """Строка лабиринта только для чтения - возвращает символы, как список"""
+    __slots__ = ('cells', 'offset', 'width')
+
+    def __init__(self, cells, offset, width):
+        self.cells = cells
+        self.offset = offset
+        self.width = width
+
+    def __len__(self):
+        return self.width
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.width
+        if not 0 <= x < self.width:
+            raise IndexError("индекс вне строки лабиринта")
+        return CELL_SYMBOLS[self.cells[self.offset + x]]
+
+    def __iter__(self):
+        return iter(self.to_string())
+
+    def to_string(self):
+        """Возвращает строку символов одной строкой"""
+        row = self.cells[self.offset:self.offset + self.width]
+        return bytes(row).translate(CELL_TO_SYMBOL).decode('ascii')
+
+
+class MazeGrid:
+    """Лабиринт в плоском bytearray: cells[y * width + x] - код клетки"""
+
+    def __init__(self, width, height, cells=None):
+        self.width = width
+        self.height = height
+        if cells is None:
+            cells = bytearray([CELL_WALL]) * (width * height)
+        if len(cells) != width * height:
+            raise ValueError(f"Размер буфера {len(cells)} не совпадает с {width}x{height}")
+        self.cells = cells
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Создает сетку из списка списков символов"""
+        height = len(rows)
+        width = len(rows[0]) if height else 0
+        text = "".join("".join(row) for row in rows)
+        cells = bytearray(text.encode('ascii').translate(SYMBOL_TO_CELL))
+        return cls(width, height, cells)
+
+    def to_rows(self):
+        """Возвращает лабиринт в виде списка списков символов"""
+        return [list(self[y].to_string()) for y in range(self.height)]
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("индекс вне лабиринта")
+        return MazeRow(self.cells, y * self.width, self.width)
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield self[y]
+
+    def index(self, x, y):
+        """Индекс клетки в плоском массиве"""
+        return y * self.width + x
+
+    def cell(self, x, y):
+        """Возвращает код клетки (CELL_*)"""
+        return self.cells[y * self.width + x]
+
+    def find(self, code):
+        """Возвращает координаты первой клетки с кодом или None"""
+        if isinstance(self.cells, memoryview):
+            i = self.cells.tobytes().find(code)  # у memoryview нет find
+        else:
+            i = self.cells.find(code)
+        if i < 0:
+            return None
+        return (i % self.width, i // self.width)
+
+    def memory_usage(self):
+        """Размер буфера клеток в байтах"""
+        return len(self.cells)
+
+
+def as_grid(maze):
+    """Возвращает MazeGrid для лабиринта в любом представлении"""
+    if isinstance(maze, MazeGrid):
+        return maze
+    return MazeGrid.from_rows(maze)
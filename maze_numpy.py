@@ -0,0 +1,90 @@
+# maze_numpy.py - пакетные проходы генератора на NumPy (опциональный бэкенд)
+import numpy as np
+from config import *
+from maze_grid import MazeGrid
+
+
+def rows_to_array(rows):
+    """Переводит список списков символов в массив кодов клеток (H, W)"""
+    grid = MazeGrid.from_rows(rows)
+    return np.frombuffer(grid.cells, dtype=np.uint8).reshape(grid.height, grid.width)
+
+
+def array_to_rows(array):
+    """Переводит массив кодов клеток обратно в список списков символов"""
+    height, width = array.shape
+    return MazeGrid(width, height, bytearray(array.tobytes())).to_rows()
+
+
+def count_empty_neighbors(array):
+    """Считает пустые клетки среди 4 соседей каждой клетки сдвигами массива"""
+    empty = (array == CELL_EMPTY).astype(np.int8)
+    counts = np.zeros(array.shape, dtype=np.int8)
+    counts[1:, :] += empty[:-1, :]
+    counts[:-1, :] += empty[1:, :]
+    counts[:, 1:] += empty[:, :-1]
+    counts[:, :-1] += empty[:, 1:]
+    return counts
+
+
+def run_bulk_passes(generator, seed):
+    """Выполняет случайные проходы и соединение областей пакетно.
+
+    Фазы и счетчики статистики те же, что у проходов на Python, чтобы
+    бэкенды можно было сравнивать в GenerationStats и бенчмарке.
+    """
+    rng = np.random.default_rng(seed)
+    stats = generator.stats
+    with stats.phase("random_paths"):
+        array = rows_to_array(generator.maze).copy()
+        add_random_paths(generator, array, rng)
+    with stats.phase("connect_areas"):
+        connect_isolated_areas(generator, array, rng)
+        generator.maze = array_to_rows(array)
+
+
+def _carve_sampled(array, xs, ys, min_empty):
+    """Убирает стены в выбранных клетках, у которых достаточно пустых соседей.
+
+    Возвращает число убранных стен (клетка, выбранная дважды, считается один раз).
+    """
+    counts = count_empty_neighbors(array)
+    carvable = (array[ys, xs] == CELL_WALL) & (counts[ys, xs] >= min_empty)
+    ys, xs = ys[carvable], xs[carvable]
+    array[ys, xs] = CELL_EMPTY
+    return len(np.unique(ys * array.shape[1] + xs))
+
+
+def add_random_paths(generator, array, rng):
+    """Аналог _add_random_paths: все случайные клетки выбираются разом"""
+    width, height = generator.width, generator.height
+    if width >= 400:
+        extra_paths = width * height // 60
+    elif width >= 200:
+        extra_paths = width * height // 50
+    else:
+        extra_paths = width * height // 40
+
+    xs = rng.integers(1, width - 1, extra_paths)
+    ys = rng.integers(1, height - 1, extra_paths)
+    carved = _carve_sampled(array, xs, ys, 1)
+    generator.stats.count("tried", extra_paths)
+    generator.stats.count("carved", carved)
+
+
+def connect_isolated_areas(generator, array, rng):
+    """Аналог _connect_isolated_areas: стена убирается при 2+ пустых соседях"""
+    width, height = generator.width, generator.height
+    if width >= 400:
+        connection_attempts = width * height // 500
+    elif width >= 200:
+        connection_attempts = width * height // 400
+    else:
+        connection_attempts = width * height // 300
+
+    xs = rng.integers(2, width - 2, connection_attempts)
+    ys = rng.integers(2, height - 2, connection_attempts)
+    carved = _carve_sampled(array, xs, ys, 2)
+    generator.stats.count("tried", connection_attempts)
+    generator.stats.count("carved", carved)
+
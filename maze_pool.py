@@ -0,0 +1,154 @@
+# maze_pool.py - запас готовых лабиринтов для мгновенного рестарта
+import json
+import multiprocessing
+import os
+import random
+import threading
+from collections import deque
+from config import *
+from maze_cache import MazeCache
+from maze_generator import MazeGenerator
+
+
+def _generate_into_cache(params, seed):
+    """Строит лабиринт в процессе пула и кладет его в дисковый кэш.
+
+    Возвращает (сид или None, ошибки кэша): процесс пула не печатает,
+    его ошибки показывает игра.
+    """
+    width, height, room_size, options, cache_dir, cache_bytes = params
+    cache = MazeCache(cache_dir, cache_bytes)
+    generator = MazeGenerator(width, height, room_size, seed=seed, verbose=False,
+                              cache=cache, **options)
+    return (seed if generator.generate_maze() else None), cache.errors
+
+
+class MazePool:
+    """Ограниченный запас готовых лабиринтов одной сложности.
+
+    Лабиринты строятся в отдельном процессе (он не делит GIL с игрой) и
+    сохраняются в дисковый кэш; в пуле хранятся только их сиды. take()
+    открывает готовый лабиринт из кэша через mmap за миллисекунды и
+    заказывает замену; первое пополнение запускает refill(), чтобы не
+    мешать генерации текущего лабиринта. При persist=True сиды готовых лабиринтов пишутся
+    в MAZE_POOL_FILE в каталоге кэша и переживают перезапуск игры.
+
+    Пул работает во время игры, поэтому ничего не печатает: ошибки
+    копятся в errors и попадают в дамп игры. close() останавливает процесс
+    генерации сразу, не дожидаясь начатого лабиринта.
+    """
+
+    def __init__(self, name, width, height, room_size, cache, size=MAZE_POOL_SIZE,
+                 persist=MAZE_POOL_PERSIST, **options):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.room_size = room_size
+        self.cache = cache
+        self.size = size
+        self.persist = persist
+        self.options = options  # остальные параметры MazeGenerator
+        self.path = os.path.join(cache.directory, MAZE_POOL_FILE)
+        self.errors = []
+        self.ready = deque()
+        self.pending = 0
+        # Колбэки приходят из потока результатов multiprocessing.Pool
+        self._lock = threading.RLock()
+        self._closed = False
+        self._executor = None
+
+        if persist:
+            self.ready.extend(seed for seed in self._load_seeds() if self._is_cached(seed))
+
+    def _make_generator(self, seed):
+        return MazeGenerator(self.width, self.height, self.room_size, seed=seed,
+                             verbose=False, cache=self.cache, **self.options)
+
+    def _is_cached(self, seed):
+        """Есть ли лабиринт с этим сидом в дисковом кэше"""
+        return os.path.exists(self.cache.path(self._make_generator(seed).cache_key()))
+
+    def refill(self):
+        """Заказывает генерацию недостающих лабиринтов"""
+        with self._lock:
+            if self._closed:
+                return
+            missing = self.size - len(self.ready) - self.pending
+            if missing <= 0:
+                return
+            if self._executor is None:
+                self._executor = multiprocessing.Pool(1)
+            params = (self.width, self.height, self.room_size, self.options,
+                      self.cache.directory, self.cache.max_bytes)
+            for _ in range(missing):
+                self._executor.apply_async(_generate_into_cache, (params, random.randrange(1 << 32)),
+                                           callback=self._on_generated,
+                                           error_callback=self._on_failed)
+                self.pending += 1
+
+    def _on_generated(self, result):
+        seed, errors = result
+        with self._lock:
+            self.pending -= 1
+            self.errors.extend(errors)
+            if seed is None:
+                return
+            self.ready.append(seed)
+        self._save_seeds()
+
+    def _on_failed(self, error):
+        with self._lock:
+            self.pending -= 1
+            self.errors.append(f"Ошибка генерации в запасе: {error}")
+
+    def take(self):
+        """Готовый генератор с уже загруженным лабиринтом или None, если запас пуст"""
+        generator = None
+        while generator is None:
+            try:
+                seed = self.ready.popleft()
+            except IndexError:
+                break
+            candidate = self._make_generator(seed)
+            # Запись могла быть вытеснена из кэша - тогда берем следующую
+            if self._is_cached(seed) and candidate.generate_maze() and candidate.attempts == 0:
+                generator = candidate
+        self._save_seeds()
+        self.refill()
+        return generator
+
+    def _load_seeds(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f).get(self.name, [])
+        except (OSError, ValueError):
+            return []
+
+    def _save_seeds(self):
+        """Сохраняет сиды готовых лабиринтов этой сложности"""
+        if not self.persist:
+            return
+        with self._lock:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    pools = json.load(f)
+            except (OSError, ValueError):
+                pools = {}
+            pools[self.name] = list(self.ready)
+            try:
+                os.makedirs(self.cache.directory, exist_ok=True)
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(pools, f, ensure_ascii=False)
+            except OSError as e:
+                self.errors.append(f"Не удалось сохранить запас лабиринтов: {e}")
+
+    def close(self):
+        """Останавливает пополнение; начатая генерация прерывается"""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        # Вне блокировки: terminate() ждет поток колбэков, а тот - блокировку.
+        # Запись в кэш атомарна, так что прерванная генерация ничего не портит
+        if executor is not None:
+            executor.terminate()
+            executor.join()
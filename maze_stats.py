@@ -0,0 +1,109 @@
+# maze_stats.py - замеры времени, памяти и счетчики по фазам генерации
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class GenerationStats:
+    """Статистика генерации: для каждой фазы время, число вызовов,
+    пик выделенной памяти (если включен tracemalloc) и счетчики.
+
+    Фазы не вкладываются друг в друга: счетчики относятся к фазе,
+    которая выполняется сейчас.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.total_time = 0.0
+        self._current = None
+        self._started = None
+        self._own_tracing = False
+
+    def begin(self):
+        """Начинает новый сбор статистики (вызывается в начале generate_maze)"""
+        self.phases = {}
+        self.total_time = 0.0
+        self._current = None
+        self._started = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+
+    def end(self):
+        """Завершает сбор статистики"""
+        if self._started is not None:
+            self.total_time = time.perf_counter() - self._started
+            self._started = None
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+
+    def _record(self, name):
+        record = self.phases.get(name)
+        if record is None:
+            record = {"calls": 0, "time": 0.0, "counters": {}}
+            if self.trace_memory:
+                record["peak_bytes"] = 0
+            self.phases[name] = record
+        return record
+
+    @contextmanager
+    def phase(self, name):
+        """Замеряет фазу: with stats.phase("base_maze"): ..."""
+        record = self._record(name)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            base_memory = tracemalloc.get_traced_memory()[0]
+        self._current = record
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["time"] += time.perf_counter() - started
+            record["calls"] += 1
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1] - base_memory
+                record["peak_bytes"] = max(record["peak_bytes"], peak)
+            self._current = None
+
+    def count(self, name, amount=1):
+        """Увеличивает счетчик текущей фазы (вне фазы ничего не делает)"""
+        if self._current is not None:
+            counters = self._current["counters"]
+            counters[name] = counters.get(name, 0) + amount
+
+    def merge(self, phases):
+        """Добавляет статистику фаз, собранную в другом процессе (to_dict()["phases"])"""
+        for name, other in phases.items():
+            record = self._record(name)
+            record["calls"] += other["calls"]
+            record["time"] += other["time"]
+            if "peak_bytes" in record and "peak_bytes" in other:
+                record["peak_bytes"] = max(record["peak_bytes"], other["peak_bytes"])
+            for counter, value in other["counters"].items():
+                record["counters"][counter] = record["counters"].get(counter, 0) + value
+
+    def to_dict(self):
+        return {
+            "total_time": self.total_time,
+            "trace_memory": self.trace_memory,
+            "phases": self.phases,
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def format(self):
+        """Таблица для вывода в консоль или дамп"""
+        lines = [f"Всего: {self.total_time:.3f} с"]
+        for name, record in self.phases.items():
+            line = f"  {name:<16} {record['time']:8.3f} с  x{record['calls']}"
+            if "peak_bytes" in record:
+                line += f"  пик {record['peak_bytes'] / 1024:.0f} КБ"
+            if record["counters"]:
+                line += "  " + ", ".join(f"{key}={value}" for key, value in record["counters"].items())
+            lines.append(line)
+        return "\n".join(lines)
@@ -0,0 +1,117 @@
+# maze_stream.py - построчная генерация огромных лабиринтов (алгоритм Эллера)
+import random
+import sys
+import time
+from config import *
+from disjoint_set import DisjointSet
+from maze_file import FLAG_GUARANTEED, write_maze_rows
+
+# Версия потокового алгоритма (записывается в заголовок файла)
+STREAM_VERSION = 1
+
+
+def stream_layout(width, height):
+    """Число ячеек по горизонтали и вертикали, старт и выход.
+
+    Ячейки лабиринта лежат в нечетных координатах, как у DFS-генератора;
+    при четном размере последний столбец (строка) остается стеной.
+    """
+    cells_x = (width - 1) // 2
+    cells_y = (height - 1) // 2
+    if cells_x < 1 or cells_y < 1 or cells_x * cells_y < 2:
+        raise ValueError(f"Слишком маленький лабиринт: {width}x{height}")
+    start = (1, 1)
+    exit = (2 * cells_x - 1, 2 * cells_y - 1)
+    return cells_x, cells_y, start, exit
+
+
+def iter_maze_rows(width, height, seed, mark_ends=True):
+    """Выдает строки лабиринта (bytearray кодов клеток) сверху вниз.
+
+    Алгоритм Эллера: хранится только номер множества для каждой ячейки
+    текущей строки, поэтому память - O(width) независимо от высоты.
+    Получается идеальный лабиринт: любые две ячейки соединены ровно
+    одним путем, так что выход всегда достижим из старта.
+    mark_ends=False - старт и выход не отмечаются (лабиринт как фрагмент мира).
+    """
+    cells_x, cells_y, start, exit = stream_layout(width, height)
+    rng = random.Random(seed)
+    wall_row = bytes([CELL_WALL]) * width
+
+    yield bytearray(wall_row)
+
+    # Номера множеств ячеек текущей строки (-1 - ячейка еще без множества)
+    sets = [-1] * cells_x
+    for cell_y in range(cells_y):
+        last_row = cell_y == cells_y - 1
+
+        # Ячейки без множества получают новые номера
+        used = set(sets)
+        free_labels = (label for label in range(cells_x) if label not in used)
+        for i in range(cells_x):
+            if sets[i] < 0:
+                sets[i] = next(free_labels)
+
+        # Строка ячеек: случайно объединяем соседей из разных множеств
+        forest = DisjointSet(cells_x)
+        row = bytearray(wall_row)
+        row[1:2 * cells_x:2] = bytes(cells_x)
+        coins = rng.randbytes(cells_x)
+        for i in range(cells_x - 1):
+            if (last_row or coins[i] < 128) and forest.union(sets[i], sets[i + 1]):
+                row[2 * i + 2] = CELL_EMPTY
+        if mark_ends and cell_y == 0:
+            row[start[0]] = CELL_START
+        if mark_ends and last_row:
+            row[exit[0]] = CELL_EXIT
+        yield row
+
+        if last_row:
+            break
+
+        # Строка проходов вниз: у каждого множества минимум один проход
+        passages = bytearray(wall_row)
+        coins = rng.randbytes(cells_x)
+        roots = [forest.find(label) for label in sets]
+        groups = {}
+        for i, root in enumerate(roots):
+            groups.setdefault(root, []).append(i)
+        next_sets = [-1] * cells_x
+        for root, members in groups.items():
+            down = [i for i in members if coins[i] < 128]
+            if not down:
+                down = [members[rng.randrange(len(members))]]
+            for i in down:
+                passages[2 * i + 1] = CELL_EMPTY
+                next_sets[i] = root
+        sets = next_sets
+        yield passages
+
+    # Нижняя граница и лишняя строка при четной высоте
+    for _ in range(height - 2 * cells_y):
+        yield bytearray(wall_row)
+
+
+def write_streamed_maze(path, width, height, seed=None):
+    """Генерирует лабиринт и сразу пишет его в двоичный файл (maze_file.py)"""
+    if seed is None:
+        seed = random.randrange(1 << 32)
+    _, _, start, exit = stream_layout(width, height)
+    write_maze_rows(path, width, height, iter_maze_rows(width, height, seed),
+                    start=start, exit=exit, seed=seed, room_size=0,
+                    generator_version=STREAM_VERSION, flags=FLAG_GUARANTEED,
+                    backend="eller")
+    return {"start": start, "exit": exit, "seed": seed}
+
+
+if __name__ == "__main__":
+    # python maze_stream.py 10000 10000 huge.maze [сид]
+    if len(sys.argv) < 4:
+        print("Использование: python maze_stream.py ШИРИНА ВЫСОТА ФАЙЛ [СИД]")
+        sys.exit(1)
+    width, height, path = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3]
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    started = time.perf_counter()
+    info = write_streamed_maze(path, width, height, seed)
+    print(f"Лабиринт {width}x{height} записан в {path} за {time.perf_counter() - started:.1f} с "
+          f"(сид {info['seed']}, старт {info['start']}, выход {info['exit']})")
@@ -0,0 +1,200 @@
+# maze_world.py - огромный мир из фрагментов, которые генерируются по мере надобности
+import random
+import time
+from collections import OrderedDict
+from itertools import islice
+from config import *
+from maze_grid import CELL_SYMBOLS
+from maze_stream import iter_maze_rows
+
+
+class ChunkedRow:
+    """Строка мира только для чтения - возвращает символы, как список"""
+    __slots__ = ('world', 'y')
+
+    def __init__(self, world, y):
+        self.world = world
+        self.y = y
+
+    def __len__(self):
+        return self.world.width
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.world.width
+        if not 0 <= x < self.world.width:
+            raise IndexError("индекс вне строки лабиринта")
+        return CELL_SYMBOLS[self.world.cell(x, self.y)]
+
+    def __iter__(self):
+        for x in range(self.world.width):
+            yield self[x]
+
+
+class ChunkedMaze:
+    """Лабиринт из квадратных фрагментов chunk_size x chunk_size.
+
+    Фрагмент строится при первом обращении из своего сида (сид мира и
+    координаты фрагмента), поэтому его можно выбросить и потом получить
+    заново точно таким же. В памяти держится не больше max_chunks
+    фрагментов, давно не использованные вытесняются.
+
+    Каждый фрагмент - идеальный лабиринт (алгоритм Эллера), у которого
+    нулевой столбец и нулевая строка - стены-швы с соседями слева и сверху.
+    Двери в этих швах фрагмент прорубает сам: по обе стороны шва лежат
+    ячейки в нечетных координатах, которые всегда открыты, поэтому соседа
+    знать не нужно, а мир остается связным.
+    """
+
+    def __init__(self, width, height, seed, chunk_size=CHUNK_SIZE, max_chunks=CHUNK_CACHE_SIZE):
+        if chunk_size < 4 or chunk_size % 2:
+            raise ValueError(f"Размер фрагмента должен быть четным и не меньше 4: {chunk_size}")
+        self.chunk_size = chunk_size
+        # Размер мира - целое число фрагментов плюс стена справа и снизу
+        self.chunks_x = max(1, (width - 1) // chunk_size)
+        self.chunks_y = max(1, (height - 1) // chunk_size)
+        self.width = self.chunks_x * chunk_size + 1
+        self.height = self.chunks_y * chunk_size + 1
+        self.seed = seed
+        self.max_chunks = max_chunks
+        self.start = (1, 1)
+        self.exit = (self.width - 2, self.height - 2)
+        self.chunks_generated = 0
+        self._chunks = OrderedDict()
+        self._last_key = None
+        self._last_chunk = None
+
+    def chunk_seed(self, chunk_x, chunk_y):
+        """Сид фрагмента (строка, чтобы не зависеть от хеширования Python)"""
+        return f"{self.seed}:{chunk_x}:{chunk_y}"
+
+    def _generate_chunk(self, chunk_x, chunk_y):
+        """Строит фрагмент: bytearray кодов клеток chunk_size x chunk_size"""
+        size = self.chunk_size
+        rng = random.Random(self.chunk_seed(chunk_x, chunk_y))
+        cells = bytearray()
+        # Лабиринт (size + 1) x (size + 1) без правой и нижней стены
+        for row in islice(iter_maze_rows(size + 1, size + 1, rng.getrandbits(64), mark_ends=False), size):
+            cells += row[:size]
+
+        # Двери в швах: одна обязательна, вторая добавляет петлю
+        cells_per_side = size // 2
+        if chunk_x > 0:
+            for _ in range(1 + (rng.random() < 0.5)):
+                door_y = 2 * rng.randrange(cells_per_side) + 1
+                cells[door_y * size] = CELL_EMPTY
+        if chunk_y > 0:
+            for _ in range(1 + (rng.random() < 0.5)):
+                door_x = 2 * rng.randrange(cells_per_side) + 1
+                cells[door_x] = CELL_EMPTY
+
+        if (chunk_x, chunk_y) == (0, 0):
+            cells[self.start[1] * size + self.start[0]] = CELL_START
+        if (chunk_x, chunk_y) == (self.chunks_x - 1, self.chunks_y - 1):
+            cells[(size - 1) * size + size - 1] = CELL_EXIT
+        self.chunks_generated += 1
+        return cells
+
+    def chunk(self, chunk_x, chunk_y):
+        """Возвращает фрагмент, при необходимости генерируя его"""
+        key = (chunk_x, chunk_y)
+        cells = self._chunks.get(key)
+        if cells is not None:
+            self._chunks.move_to_end(key)
+            return cells
+        cells = self._generate_chunk(chunk_x, chunk_y)
+        self._chunks[key] = cells
+        if len(self._chunks) > self.max_chunks:
+            evicted, _ = self._chunks.popitem(last=False)
+            if evicted == self._last_key:
+                self._last_key = self._last_chunk = None
+        return cells
+
+    def cell(self, x, y):
+        """Возвращает код клетки (CELL_*); правая и нижняя граница - стена"""
+        if not (0 <= x < self.width - 1 and 0 <= y < self.height - 1):
+            return CELL_WALL
+        size = self.chunk_size
+        chunk_x, local_x = divmod(x, size)
+        chunk_y, local_y = divmod(y, size)
+        key = (chunk_x, chunk_y)
+        # Лучи и игрок обычно обращаются к одному фрагменту подряд
+        if key != self._last_key:
+            self._last_chunk = self.chunk(chunk_x, chunk_y)
+            self._last_key = key
+        return self._last_chunk[local_y * size + local_x]
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("индекс вне лабиринта")
+        return ChunkedRow(self, y)
+
+    def resident_chunks(self):
+        """Координаты фрагментов, которые сейчас в памяти"""
+        return list(self._chunks)
+
+    def memory_usage(self):
+        """Размер загруженных фрагментов в байтах"""
+        return len(self._chunks) * self.chunk_size * self.chunk_size
+
+
+class ChunkedMazeGenerator:
+    """Замена MazeGenerator для мира из фрагментов: запуск не зависит от размера"""
+
+    def __init__(self, width=None, height=None, seed=None, chunk_size=CHUNK_SIZE,
+                 max_chunks=CHUNK_CACHE_SIZE, verbose=True):
+        self.width = width if width is not None else MAP_WIDTH
+        self.height = height if height is not None else MAP_HEIGHT
+        self.room_size = 0
+        self.seed = seed
+        self.maze_seed = seed
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.verbose = verbose
+        self.maze = None
+        self.start_pos = None
+        self.exit_pos = None
+        self.attempts = 0
+        self.attempt_times = []
+
+    def generate_maze(self):
+        """Создает мир; фрагменты будут построены при первом обращении"""
+        started = time.perf_counter()
+        self.maze_seed = self.seed if self.seed is not None else random.randrange(1 << 32)
+        self.maze = ChunkedMaze(self.width, self.height, self.maze_seed,
+                                self.chunk_size, self.max_chunks)
+        self.width, self.height = self.maze.width, self.maze.height
+        self.start_pos = self.maze.start
+        self.exit_pos = self.maze.exit
+        self.attempts = 1
+        self.attempt_times = [time.perf_counter() - started]
+        if self.verbose:
+            print(f"Мир {self.width}x{self.height} из фрагментов {self.chunk_size}x{self.chunk_size} "
+                  f"создан (сид {self.maze_seed})")
+        return True
+
+    def get_maze(self):
+        return self.maze
+
+    def get_maze_string(self):
+        """Карта загруженной части мира (весь мир целиком не строится)"""
+        world = self.maze
+        chunks = world.resident_chunks()
+        lines = [f"Размер лабиринта: {world.width}x{world.height}, "
+                 f"загружено фрагментов: {len(chunks)}"]
+        if chunks:
+            size = world.chunk_size
+            min_x = min(x for x, _ in chunks) * size
+            max_x = (max(x for x, _ in chunks) + 1) * size
+            min_y = min(y for _, y in chunks) * size
+            max_y = (max(y for _, y in chunks) + 1) * size
+            lines.append(f"Показана область ({min_x}, {min_y}) - ({max_x - 1}, {max_y - 1})")
+            for y in range(min_y, max_y):
+                lines.append("".join(CELL_SYMBOLS[world.cell(x, y)] for x in range(min_x, max_x)))
+        lines.append("")
+        return "\n".join(lines)
@@ -0,0 +1,124 @@
+# minimap.py - мини-карта из заранее отрисованных строк и пирамида уменьшенных копий
+import math
+from config import *
+from maze_grid import MazeGrid
+
+# Символы мини-карты по коду клетки
+CELL_TO_MINIMAP = bytearray(b' ' * 256)
+CELL_TO_MINIMAP[CELL_WALL] = ord('#')
+CELL_TO_MINIMAP[CELL_EXIT] = ord('E')  # Яркое отображение выхода на мини-карте
+CELL_TO_MINIMAP[CELL_START] = ord('S')
+CELL_TO_MINIMAP = bytes(CELL_TO_MINIMAP)
+
+# Уменьшенные уровни: байт - доля стен в блоке (0..255), символ - по плотности
+WALL_DENSITY = bytearray(256)
+WALL_DENSITY[CELL_WALL] = 255
+WALL_DENSITY = bytes(WALL_DENSITY)
+DENSITY_TO_MINIMAP = bytes(ord(' ') if d == 0 else ord('.') if d < 96 else
+                           ord('+') if d < 192 else ord('#') for d in range(256))
+
+
+def player_arrow(angle):
+    """Стрелка, показывающая направление взгляда игрока"""
+    angle_deg = math.degrees(angle)
+    if 45 <= angle_deg < 135:
+        return "↓"  # смотрит вниз
+    elif 135 <= angle_deg < 225:
+        return "←"  # смотрит влево
+    elif 225 <= angle_deg < 315:
+        return "↑"  # смотрит вверх
+    return "→"  # смотрит вправо
+
+
+def _downsample(rows):
+    """Следующий уровень пирамиды: среднее по блокам 2x2 (нечетный край дублируется)"""
+    result = []
+    for y in range(0, len(rows), 2):
+        top = rows[y]
+        bottom = rows[y + 1] if y + 1 < len(rows) else top
+        if len(top) % 2:
+            top += top[-1:]
+            bottom += bottom[-1:]
+        result.append(bytes((a + b + c + d) >> 2 for a, b, c, d in
+                            zip(top[0::2], top[1::2], bottom[0::2], bottom[1::2])))
+    return result
+
+
+class Minimap:
+    """Мини-карта одного лабиринта.
+
+    Лабиринт отрисовывается в строки один раз; кадр мини-карты - это срезы
+    этих строк вокруг игрока и стрелка поверх. Уровень level > 0 - копия,
+    уменьшенная в 2**level раз (плотность стен в блоке), со стартом и выходом
+    поверх; уровни строятся по запросу. Уровень, который целиком помещается
+    в окно, показывается весь - это обзор всей карты.
+    """
+
+    def __init__(self, maze):
+        if not isinstance(maze, MazeGrid):
+            maze = MazeGrid.from_rows(maze)
+        self.width = maze.width
+        self.height = maze.height
+        cells = bytes(maze.cells)
+        rows = [cells[y * self.width:(y + 1) * self.width] for y in range(self.height)]
+        self.levels = [[row.translate(CELL_TO_MINIMAP).decode('ascii') for row in rows]]
+        self._density = [row.translate(WALL_DENSITY) for row in rows]
+
+        # Старт и выход отмечаются на уменьшенных уровнях поверх плотности
+        self.markers = []
+        for cell, symbol in ((CELL_START, 'S'), (CELL_EXIT, 'E')):
+            index = cells.find(bytes([cell]))
+            if index >= 0:
+                self.markers.append((index % self.width, index // self.width, symbol))
+
+    def level_size(self, level):
+        """Размер уровня в символах (ширина, высота)"""
+        scale = 1 << level
+        return (self.width + scale - 1) // scale, (self.height + scale - 1) // scale
+
+    def level_count(self, size=10):
+        """Число уровней масштаба: последний целиком помещается в окно size"""
+        level = 0
+        while True:
+            width, height = self.level_size(level)
+            if width <= size * 4 and height <= size * 2:
+                return level + 1
+            level += 1
+
+    def _rows(self, level):
+        while len(self.levels) <= level:
+            self._density = _downsample(self._density)
+            rows = [list(row.translate(DENSITY_TO_MINIMAP).decode('ascii')) for row in self._density]
+            shift = len(self.levels)
+            for x, y, symbol in self.markers:
+                rows[y >> shift][x >> shift] = symbol
+            self.levels.append(["".join(row) for row in rows])
+        return self.levels[level]
+
+    def render(self, player, size=10, level=0):
+        """Окно 4*size x 2*size вокруг игрока (или вся карта, если помещается)"""
+        rows = self._rows(level)
+        width, height = self.level_size(level)
+        player_x, player_y = int(player.x) >> level, int(player.y) >> level
+        if level and width <= size * 4 and height <= size * 2:
+            left, top = 0, 0
+        else:
+            left, top = player_x - size * 2, player_y - size
+
+        lines = []
+        blank = " " * (size * 4)
+        for y in range(top, top + size * 2):
+            if not 0 <= y < height:
+                lines.append(blank)
+                continue
+            start = max(left, 0)
+            end = min(left + size * 4, width)
+            if start >= end:
+                line = blank
+            else:
+                line = " " * (start - left) + rows[y][start:end] + " " * (left + size * 4 - end)
+            if y == player_y and 0 <= player_x < width and 0 <= player_x - left < size * 4:
+                column = player_x - left
+                line = line[:column] + player_arrow(player.angle) + line[column + 1:]
+            lines.append(line)
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,148 @@
+# parallel_render.py - рендер кадра полосами колонок в пуле процессов
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from config import *
+from maze_grid import MazeGrid
+
+# Состояние процесса пула: подключенный лабиринт и рендерер полос
+_worker_maze = {"name": None, "memory": None, "grid": None}
+_worker_raycaster = {"settings": None, "raycaster": None}
+
+
+def _attach_maze(name, width, height):
+    """Лабиринт из общей памяти; подключается заново, только если он сменился"""
+    if _worker_maze["name"] != name:
+        if _worker_maze["memory"] is not None:
+            # Рендерер держит представления старой памяти в кэшах лабиринта
+            # (массив numpy, поле расстояний) - без них память не закрыть
+            _worker_raycaster.update(settings=None, raycaster=None)
+            _worker_maze["grid"] = None
+            _worker_maze["memory"].close()
+        memory = shared_memory.SharedMemory(name=name)
+        _worker_maze.update(name=name, memory=memory,
+                            grid=MazeGrid(width, height, memory.buf[:width * height]))
+    return _worker_maze["grid"]
+
+
+def _render_strip_in_worker(task):
+    """Рисует полосу кадра в процессе пула и возвращает ее текстом"""
+    from raycasting import RayCaster
+
+    (name, width, height), settings, position, angles, stride, widen, indices = task
+    grid = _attach_maze(name, width, height)
+    if _worker_raycaster["settings"] != settings:
+        console_height, max_distance, gradient_symbols, backend, skip_empty = settings
+        raycaster = RayCaster(len(angles) * 2, console_height, backend=backend,
+                              adaptive=False, workers=1)
+        raycaster.max_distance = max_distance
+        raycaster.gradient_symbols = gradient_symbols
+        raycaster.skip_empty = skip_empty
+        _worker_raycaster.update(settings=settings, raycaster=raycaster)
+    raycaster = _worker_raycaster["raycaster"]
+
+    x, y, angle = position
+    player = SimpleNamespace(x=x, y=y, angle=angle)
+    return raycaster.render_strip(player, grid, angles, stride, widen, indices).to_string()
+
+
+class StripRenderer:
+    """Рендер кадра вертикальными полосами в постоянном пуле процессов.
+
+    Лабиринт один раз копируется в общую память (multiprocessing.shared_memory),
+    и процессы читают его оттуда; на каждый кадр в процесс уходят только
+    позиция игрока и углы лучей полосы, а обратно - готовая полоса текста.
+    Полосы склеиваются построчно. render() возвращает None, если кадр
+    выгоднее нарисовать в своем процессе: мало лучей, лабиринт не плоский
+    (мир из фрагментов), пул не удалось запустить, он сломался или полоса
+    не нарисовалась.
+
+    Границы полос проходят по лучам, которые бросаются при детализации
+    всего кадра, и полоса включает луч на своей правой границе (его колонка
+    отбрасывается, она принадлежит следующей полосе). Так полоса бросает
+    те же лучи и интерполирует между теми же соседями, что и рендер в
+    одном процессе, и кадр совпадает с ним на любом уровне детализации. Причина отказа от
+    пула не печатается поверх кадра, а хранится в error (она идет в дамп).
+    """
+
+    def __init__(self, workers, min_rays=PARALLEL_MIN_RAYS):
+        self.workers = workers
+        self.min_rays = min_rays
+        self._executor = None
+        self._memory = None
+        self._maze = None
+        self._maze_info = None
+        self.failed = False
+        self.error = None
+
+    def _share_maze(self, maze):
+        """Копирует лабиринт в общую память (один раз на лабиринт)"""
+        if maze is self._maze:
+            return self._maze_info
+        grid = maze if isinstance(maze, MazeGrid) else MazeGrid.from_rows(maze)
+        self._release_maze()
+        self._memory = shared_memory.SharedMemory(create=True, size=max(1, grid.width * grid.height))
+        self._memory.buf[:grid.width * grid.height] = bytes(grid.cells)
+        self._maze = maze
+        self._maze_info = (self._memory.name, grid.width, grid.height)
+        return self._maze_info
+
+    def _release_maze(self):
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+        self._memory = None
+        self._maze = None
+        self._maze_info = None
+
+    def render(self, raycaster, player, maze, stride=1, widen=False):
+        """Кадр целиком одной строкой или None (рисовать в своем процессе)"""
+        if (self.failed or raycaster.num_rays < self.min_rays or
+                not isinstance(maze, (MazeGrid, list))):
+            return None
+        try:
+            maze_info = self._share_maze(maze)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        except OSError as e:
+            self.error = f"Параллельный рендер недоступен: {e}"
+            self.failed = True
+            return None
+
+        settings = (raycaster.console_height, raycaster.max_distance,
+                    raycaster.gradient_symbols, raycaster.backend, raycaster.skip_empty)
+        position = (player.x, player.y, player.angle)
+        angles = raycaster._ray_angles(player)
+        count = len(angles)
+        # Бросаемые лучи всего кадра; границы полос - ближайшие к равным долям
+        cast = raycaster._sparse_indices(count, stride) if stride > 1 else list(range(count))
+        bounds = sorted({cast[min(bisect_left(cast, count * i // self.workers), len(cast) - 1)]
+                         for i in range(self.workers)} | {count - 1})
+        tasks = []
+        for start, end in zip(bounds, bounds[1:]):
+            indices = [i - start for i in cast[bisect_left(cast, start):bisect_left(cast, end) + 1]]
+            tasks.append((maze_info, settings, position, angles[start:end + 1], stride, widen, indices))
+        try:
+            strips = [strip.split("\n") for strip in self._executor.map(_render_strip_in_worker, tasks)]
+        except Exception as e:
+            # Процесс пула упал или полоса не нарисовалась - дальше кадры
+            # рисуются в своем процессе
+            if isinstance(e, BrokenProcessPool):
+                self.error = f"Параллельный рендер остановлен: процесс пула завершился ({e})"
+            else:
+                self.error = f"Параллельный рендер остановлен: {type(e).__name__}: {e}"
+            self.failed = True
+            self.close()
+            return None
+        # Колонка правой границы каждой полосы, кроме последней, - первая колонка следующей
+        strips = [[line[:-2] for line in strip] for strip in strips[:-1]] + strips[-1:]
+        return "\n".join("".join(parts) for parts in zip(*strips))
+
+    def close(self):
+        """Останавливает пул и освобождает общую память"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._release_maze()
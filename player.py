@@ -1,5 +1,6 @@
 import math
 from config import *
+from maze_grid import MazeGrid
 
 class Player:
     def __init__(self, x, y):
@@ -126,17 +127,30 @@ class Player:
     
     def _check_collision(self, x, y, maze):
         """Проверка столкновения со стенами"""
+        # Для MazeGrid сравниваем целые коды клеток вместо символов
+        if isinstance(maze, MazeGrid):
+            cells = maze.cells
+            map_width, map_height = maze.width, maze.height
+            # Проверяем клетку, в которой находимся, и соседние для плавности
+            for dx, dy in [(0, 0), (0.2, 0), (-0.2, 0), (0, 0.2), (0, -0.2)]:
+                check_x, check_y = int(x + dx), int(y + dy)
+                if (0 <= check_x < map_width and 0 <= check_y < map_height and
+                    cells[check_y * map_width + check_x] == CELL_WALL):
+                    return True
+            return False
+        
+        map_width, map_height = len(maze[0]), len(maze)
         map_x, map_y = int(x), int(y)
         
         # Проверяем клетку, в которой находимся
-        if (0 <= map_x < len(maze[0]) and 0 <= map_y < len(maze)):
+        if (0 <= map_x < map_width and 0 <= map_y < map_height):
             if maze[map_y][map_x] == WALL_SYMBOL:
                 return True
         
         # Дополнительная проверка соседних клеток для плавности
         for dx, dy in [(0.2, 0), (-0.2, 0), (0, 0.2), (0, -0.2)]:
             check_x, check_y = int(x + dx), int(y + dy)
-            if (0 <= check_x < len(maze[0]) and 0 <= check_y < len(maze)):
+            if (0 <= check_x < map_width and 0 <= check_y < map_height):
                 if maze[check_y][check_x] == WALL_SYMBOL:
                     return True
         
@@ -145,6 +159,10 @@ class Player:
     def check_exit(self, maze):
         """Проверяет, достиг ли игрок выхода"""
         map_x, map_y = int(self.x), int(self.y)
+        if isinstance(maze, MazeGrid):
+            if (0 <= map_x < maze.width and 0 <= map_y < maze.height):
+                return maze.cells[map_y * maze.width + map_x] == CELL_EXIT
+            return False
         if (0 <= map_x < len(maze[0]) and 0 <= map_y < len(maze)):
             return maze[map_y][map_x] == EXIT_SYMBOL
         return False
\ No newline at end of file
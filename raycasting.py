@@ -1,9 +1,63 @@
 # raycasting.py - с соотношением символов 2:1 и особым отображением выхода
 import math
+import time
+from bisect import bisect_right
+from itertools import repeat
 from config import *
+from frame_buffer import FRAME_ENCODING, FrameBuffer
+from maze_grid import MazeGrid
+from minimap import Minimap, player_arrow
+from parallel_render import StripRenderer
+from render_quality import QualityController
+from wall_distance import build_wall_distance
+
+# NumPy - необязательная зависимость, нужна только для бэкенда "numpy"
+try:
+    import raycasting_numpy
+except ImportError:
+    raycasting_numpy = None
+
+# Доступные бэкенды: "auto" - numpy для широких кадров, если он установлен
+RAYCAST_BACKENDS = ("auto", "python", "numpy")
+
+# С какого числа лучей пакетный DDA быстрее цикла: на малом числе лучей
+# накладные расходы NumPy на каждый шаг больше выигрыша
+NUMPY_MIN_RAYS = 240
+
+# При адаптивной детализации соседние лучи интерполируются, только если их
+# расстояния отличаются не больше чем на столько клеток (иначе это край стены)
+INTERPOLATE_MAX_GAP = 1.0
+
+# Пропускаем пустоту, только если можно сделать вслепую хотя бы столько шагов:
+# короткий пропуск не окупает лишней проверки
+MIN_SKIP_STEPS = 2
 
 class RayCaster:
-    def __init__(self, console_width, console_height):
+    def __init__(self, console_width, console_height, backend=RAYCAST_BACKEND,
+                 adaptive=ADAPTIVE_QUALITY, workers=RENDER_WORKERS):
+        if backend not in RAYCAST_BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд рендера: {backend}")
+        if backend == "numpy" and raycasting_numpy is None:
+            raise ImportError("Для бэкенда 'numpy' нужен установленный пакет numpy")
+        if backend == "auto" and raycasting_numpy is None:
+            backend = "python"
+        self.backend = backend
+        # Массив клеток для numpy-бэкенда строится один раз на лабиринт
+        self._array_maze = None
+        self._array = None
+        self._array_size = None
+        # Поле расстояний до стен: лучи перепрыгивают пустые области
+        self.skip_empty = RAYCAST_SKIP_EMPTY
+        self._field_maze = None
+        self._field = None
+        # Адаптивная детализация: шаг лучей подбирается под бюджет кадра
+        self.quality = QualityController() if adaptive else None
+        # Параллельный рендер полос (workers > 1), процессы запускаются по требованию
+        self.parallel = StripRenderer(workers) if workers > 1 else None
+        # Мини-карта строится один раз на лабиринт
+        self._minimap_maze = None
+        self._minimap = None
+        
         self.console_width = console_width
         self.console_height = console_height
         self.fov = FOV
@@ -13,35 +67,235 @@ class RayCaster:
         # Градиент символов от самого светлого к самому темному
         self.gradient_symbols = "@%#*+=-,. "
         self.gradient_length = len(self.gradient_symbols)
+        
+        # Готовые колонки и пороги затенения; перестраиваются при смене
+        # высоты консоли, градиента или дальности прорисовки
+        self._render_cache_key = None
+        self._columns = None
+        self._shade_thresholds = None
+        # Буфер кадра переиспользуется, пока не изменится размер
+        self._frame_buffer = None
     
     def render_frame(self, player, maze):
         """Рендерит один кадр с помощью raycasting с соотношением 2:1"""
-        frame = []
-        ray_angle = player.angle - self.fov / 2
+        started = time.perf_counter()
+        stride, widen = (self.quality.stride, self.quality.widen) if self.quality is not None else (1, False)
         
-        for col in range(self.num_rays):
-            # Бросаем луч
-            distance, hit_type, hit_side, hit_exit = self._cast_ray(player.x, player.y, ray_angle, maze)
-            
+        # На больших кадрах полосы колонок рендерятся в процессах пула
+        result = None
+        if self.parallel is not None:
+            result = self.parallel.render(self, player, maze, stride, widen)
+        if result is None:
+            angles = self._ray_angles(player)
+            result = self.render_strip(player, maze, angles, stride, widen).to_string() if angles else ""
+        
+        if self.quality is not None:
+            self.quality.record(time.perf_counter() - started)
+        return result
+    
+    def render_strip(self, player, maze, angles, stride=1, widen=False, indices=None):
+        """Рисует колонки для лучей angles в буфер кадра (весь кадр или его полосу).
+        
+        stride и widen - уровень детализации (см. render_quality.py). indices -
+        номера бросаемых лучей, если их выбрал вызывающий: полоса параллельного
+        рендера получает свою долю номеров всего кадра.
+        """
+        self._ensure_render_cache()
+        columns = self._columns
+        if widen:
+            # Грубый режим: каждый брошенный луч закрывает колонки до следующего
+            if indices is None:
+                indices = self._sparse_indices(len(angles), stride)
+            rays = self._cast_rays(player, maze, [angles[i] for i in indices])
+            spans = [right - left for left, right in zip(indices, indices[1:])] + [1]
+        else:
+            rays = self._cast_all_rays(player, maze, angles, stride, indices)
+            indices = range(len(rays))
+            spans = repeat(1)
+        frame = self._get_frame_buffer(len(angles) * 2)
+        
+        for col, span, (distance, hit_side, hit_exit) in zip(indices, spans, rays):
             # Вычисляем высоту стены с учетом соотношения 2:1
             wall_height = self._calculate_wall_height(distance)
             
             # Получаем символ для стены на основе расстояния
             wall_char = self._get_wall_symbol(distance, hit_side, hit_exit)
             
-            # Создаем колонку для этого луча (учитываем соотношение 2:1)
-            column = self._create_column(wall_height, distance, wall_char, hit_side, hit_exit)
-            
-            # Добавляем две одинаковые колонки для создания широкого пикселя (2:1)
-            frame.append(column)
-            frame.append(column)  # Дублируем колонку для ширины 2
+            # Берем готовую колонку для этого луча (учитываем соотношение 2:1)
+            column = columns[(wall_height, wall_char, hit_exit)]
             
+            # Пишем колонку дважды для создания широкого пикселя (2:1)
+            frame.write_column(col * 2, column, repeat=span * 2)
+        
+        return frame
+    
+    def close(self):
+        """Останавливает процессы параллельного рендера, если они запущены"""
+        if self.parallel is not None:
+            self.parallel.close()
+    
+    def _get_frame_buffer(self, width):
+        """Буфер кадра нужного размера (все колонки перезаписываются каждый кадр)"""
+        if (self._frame_buffer is None or self._frame_buffer.width != width or
+                self._frame_buffer.height != self.console_height):
+            self._frame_buffer = FrameBuffer(width, self.console_height)
+        return self._frame_buffer
+    
+    def _ensure_render_cache(self):
+        """Перестраивает колонки и пороги затенения, если изменились их параметры"""
+        key = (self.console_height, self.gradient_symbols, self.max_distance)
+        if key != self._render_cache_key:
+            self._build_render_cache()
+            self._render_cache_key = key
+    
+    def _build_render_cache(self):
+        """Строит все возможные колонки и пороги расстояний для символов градиента.
+        
+        Колонка зависит только от высоты стены, символа и того, выход ли это,
+        поэтому вариантов всего (console_height + 1) * (len(градиента) + 2).
+        """
+        self.gradient_length = len(self.gradient_symbols)
+        try:
+            self.gradient_symbols.encode(FRAME_ENCODING)
+        except UnicodeEncodeError:
+            raise ValueError(f"Символы градиента должны быть в кодировке {FRAME_ENCODING}: "
+                             f"{self.gradient_symbols!r}")
+        
+        # Колонки хранятся в байтах - в таком виде они пишутся в буфер кадра
+        self._columns = {}
+        for wall_height in range(self.console_height + 1):
+            for wall_char in self.gradient_symbols:
+                column = self._create_column(wall_height, 0, wall_char, 0)
+                self._columns[(wall_height, wall_char, False)] = "".join(column).encode(FRAME_ENCODING)
+            for wall_char in ('0', 'O'):
+                column = self._create_column(wall_height, 0, wall_char, 0, True)
+                self._columns[(wall_height, wall_char, True)] = "".join(column).encode(FRAME_ENCODING)
+        
+        # Порог k - наименьшее расстояние, с которого индекс градиента не меньше k.
+        # Начинаем с аналитического значения и доводим по исходной формуле,
+        # чтобы поиск по порогам давал ровно тот же индекс, что и формула
+        self._shade_thresholds = []
+        for k in range(1, self.gradient_length):
+            threshold = self.max_distance * (k / (self.gradient_length - 1)) ** 2
+            while self._shade_index(threshold) < k:
+                threshold = math.nextafter(threshold, math.inf)
+            while threshold > 0 and self._shade_index(math.nextafter(threshold, 0)) >= k:
+                threshold = math.nextafter(threshold, 0)
+            self._shade_thresholds.append(threshold)
+    
+    def _shade_index(self, distance):
+        """Индекс символа градиента по расстоянию (формула, по которой строятся пороги)"""
+        # Используем квадратный корень для смещения акцента на ближние дистанции
+        normalized_distance = (distance / self.max_distance) ** 0.5
+        return int(normalized_distance * (self.gradient_length - 1))
+    
+    def _ray_angles(self, player):
+        """Углы лучей слева направо (накапливаются так же, как раньше в цикле)"""
+        angles = []
+        ray_angle = player.angle - self.fov / 2
+        for col in range(self.num_rays):
+            angles.append(ray_angle)
             ray_angle += self.fov / self.num_rays
+        return angles
+    
+    def _cast_all_rays(self, player, maze, angles, stride=1, indices=None):
+        """Список (расстояние, сторона, выход) для лучей под углами angles.
+        
+        При stride > 1 бросается каждый stride-й луч и последний (или лучи
+        indices), а остальные колонки заполняет _interpolate_rays.
+        """
+        if stride > 1 and len(angles) > 2:
+            if indices is None:
+                indices = self._sparse_indices(len(angles), stride)
+            cast = self._cast_rays(player, maze, [angles[i] for i in indices])
+            return self._interpolate_rays(indices, cast)
+        return self._cast_rays(player, maze, angles)
+    
+    def _sparse_indices(self, count, stride):
+        """Номера бросаемых лучей: каждый stride-й и последний"""
+        indices = list(range(0, count, stride))
+        if indices and indices[-1] != count - 1:
+            indices.append(count - 1)
+        return indices
+    
+    def _interpolate_rays(self, indices, cast):
+        """Заполняет колонки между брошенными лучами.
         
-        return self._format_frame(frame)
+        Расстояние интерполируется линейно, если соседние лучи попали в одну
+        и ту же поверхность (та же сторона, не выход, близкие расстояния);
+        на краях стен и у выхода берется ближайший брошенный луч, чтобы не
+        размывать границы.
+        """
+        results = []
+        for (left, left_ray), (right, right_ray) in zip(zip(indices, cast), zip(indices[1:], cast[1:])):
+            results.append(left_ray)
+            left_distance, left_side, left_exit = left_ray
+            right_distance, right_side, right_exit = right_ray
+            smooth = (left_side == right_side and not left_exit and not right_exit and
+                      abs(left_distance - right_distance) <= INTERPOLATE_MAX_GAP)
+            span = right - left
+            for i in range(1, span):
+                if smooth:
+                    distance = left_distance + (right_distance - left_distance) * i / span
+                    results.append((distance, left_side, False))
+                else:
+                    results.append(left_ray if i * 2 < span else right_ray)
+        results.append(cast[-1])
+        return results
+    
+    def _cast_rays(self, player, maze, angles):
+        """Бросает лучи под углами angles (цикл или numpy по настройке backend)"""
+        use_numpy = self.backend == "numpy" or (self.backend == "auto" and
+                                                len(angles) >= NUMPY_MIN_RAYS)
+        cells = self._maze_array(maze) if use_numpy else None
+        if cells is None:
+            field = self._wall_distance(maze)
+            results = []
+            for ray_angle in angles:
+                distance, hit_type, hit_side, hit_exit = self._cast_ray(player.x, player.y, ray_angle,
+                                                                        maze, field)
+                results.append((distance, hit_side, hit_exit))
+            return results
+        
+        # Направления считаем через math, как в _cast_ray, чтобы кадры совпадали до бита
+        angles = [angle % (2 * math.pi) for angle in angles]
+        dir_x = [math.cos(angle) for angle in angles]
+        dir_y = [math.sin(angle) for angle in angles]
+        width, height = self._array_size
+        distances, sides, exits = raycasting_numpy.cast_rays(
+            cells, width, height, player.x, player.y, dir_x, dir_y, self.max_distance)
+        return list(zip(distances.tolist(), sides.tolist(), exits.tolist()))
+    
+    def _wall_distance(self, maze):
+        """Поле расстояний до стен для пропуска пустоты (строится один раз на лабиринт)"""
+        if not self.skip_empty:
+            return None
+        if maze is not self._field_maze:
+            self._field_maze = maze
+            self._field = (build_wall_distance(maze) if isinstance(maze, (MazeGrid, list))
+                           else None)
+        return self._field
     
-    def _cast_ray(self, start_x, start_y, angle, maze):
-        """Бросает луч и возвращает расстояние до стены/выхода и тип попадания"""
+    def _maze_array(self, maze):
+        """Плоский массив клеток лабиринта или None, если лабиринт не плоский (мир из фрагментов)"""
+        if maze is not self._array_maze:
+            if isinstance(maze, MazeGrid):
+                grid = maze
+            elif isinstance(maze, list):
+                grid = MazeGrid.from_rows(maze)
+            else:
+                grid = None
+            self._array_maze = maze
+            self._array = raycasting_numpy.grid_array(grid) if grid is not None else None
+            self._array_size = (grid.width, grid.height) if grid is not None else None
+        return self._array
+    
+    def _cast_ray(self, start_x, start_y, angle, maze, field=None):
+        """Бросает луч и возвращает расстояние до стены/выхода и тип попадания.
+        
+        field - поле расстояний до стен (wall_distance.py) для пропуска пустоты;
+        результат с ним и без него одинаковый.
+        """
         # Нормализуем угол
         angle %= 2 * math.pi
         
@@ -77,6 +331,16 @@ class RayCaster:
         distance = 0
         hit_exit = False
         
+        # Для MazeGrid сравниваем целые коды клеток вместо символов
+        if isinstance(maze, MazeGrid):
+            cells = maze.cells
+            map_width, map_height = maze.width, maze.height
+            wall_value, exit_value = CELL_WALL, CELL_EXIT
+        else:
+            cells = None
+            map_width, map_height = len(maze[0]), len(maze)
+            wall_value, exit_value = WALL_SYMBOL, EXIT_SYMBOL
+        
         while not hit and distance < self.max_distance:
             if side_dist_x < side_dist_y:
                 side_dist_x += delta_dist_x
@@ -88,11 +352,33 @@ class RayCaster:
                 side = 1
             
             # Проверяем, не вышли ли за границы карты
-            if (map_x < 0 or map_x >= len(maze[0]) or 
-                map_y < 0 or map_y >= len(maze)):
+            if (map_x < 0 or map_x >= map_width or 
+                map_y < 0 or map_y >= map_height):
                 hit = True
                 distance = self.max_distance
-            elif maze[map_y][map_x] == WALL_SYMBOL:
+                continue
+            
+            # Пропуск пустоты: если до ближайшей стены free клеток, то следующие
+            # free - 1 шагов DDA (каждый сдвигает на клетку по одной оси) гарантированно
+            # идут по пустым клеткам - делаем их без проверок, той же арифметикой.
+            # Ненулевое значение поля заодно значит, что клетка пустая
+            if field is not None:
+                free = field[map_y * map_width + map_x]
+                if free:
+                    if free > MIN_SKIP_STEPS:
+                        for _ in range(free - 1):
+                            if side_dist_x < side_dist_y:
+                                side_dist_x += delta_dist_x
+                                map_x += step_x
+                                side = 0
+                            else:
+                                side_dist_y += delta_dist_y
+                                map_y += step_y
+                                side = 1
+                    continue
+            
+            cell = cells[map_y * map_width + map_x] if cells is not None else maze[map_y][map_x]
+            if cell == wall_value:
                 hit = True
                 # Вычисляем расстояние
                 if side == 0:
@@ -102,7 +388,7 @@ class RayCaster:
                 
                 # Абсолютное значение
                 distance = abs(distance)
-            elif maze[map_y][map_x] == EXIT_SYMBOL:
+            elif cell == exit_value:
                 hit = True
                 hit_exit = True
                 # Вычисляем расстояние
@@ -141,12 +427,11 @@ class RayCaster:
         if distance >= self.max_distance:
             return ' '  # Слишком далеко - пробел (самый темный)
     
-        # Усиливаем градиент на коротких расстояниях
-        # Используем квадратный корень для смещения акцента на ближние дистанции
-        normalized_distance = (distance / self.max_distance) ** 0.5
-    
-        # Ближе = светлые символы (@, %), дальше = темные символы (., )
-        gradient_index = int(normalized_distance * (self.gradient_length - 1))
+        # Усиливаем градиент на коротких расстояниях (квадратный корень в _shade_index);
+        # ближе = светлые символы (@, %), дальше = темные символы (., ).
+        # Индекс ищем по заранее посчитанным порогам расстояний
+        self._ensure_render_cache()
+        gradient_index = bisect_right(self._shade_thresholds, distance)
         gradient_index = max(0, min(self.gradient_length - 1, gradient_index))
     
         # Добавляем эффект для разных сторон стен
@@ -221,26 +506,16 @@ class RayCaster:
         
         return column
     
-    def _format_frame(self, frame):
-        """Форматирует frame для вывода в консоль"""
-        if not frame:
-            return ""
-        
-        # Транспонируем frame (превращаем колонки в строки)
-        output_lines = []
-        for row in range(len(frame[0])):
-            line = ""
-            for col in range(len(frame)):
-                if row < len(frame[col]):
-                    line += frame[col][row]
-                else:
-                    line += " "
-            output_lines.append(line)
+    def render_minimap(self, player, maze, size=10, level=0):
+        """Рендерит мини-карту с учетом соотношения 2:1.
+        
+        level - масштаб (уменьшение в 2**level раз, см. minimap.py); мир из
+        фрагментов рисуется по клеткам и только в масштабе 1:1.
+        """
+        minimap = self._get_minimap(maze)
+        if minimap is not None:
+            return minimap.render(player, size, level)
         
-        return "\n".join(output_lines)
-    
-    def render_minimap(self, player, maze, size=10):
-        """Рендерит мини-карту с учетом соотношения 2:1"""
         minimap = ""
         player_map_x = int(player.x)
         player_map_y = int(player.y)
@@ -252,15 +527,7 @@ class RayCaster:
                 if (0 <= x < len(maze[0]) and 0 <= y < len(maze)):
                     if x == player_map_x and y == player_map_y:
                         # Игрок - стрелка, показывающая направление
-                        angle_deg = math.degrees(player.angle)
-                        if 45 <= angle_deg < 135:
-                            line += "↓"  # смотрит вниз
-                        elif 135 <= angle_deg < 225:
-                            line += "←"  # смотрит влево
-                        elif 225 <= angle_deg < 315:
-                            line += "↑"  # смотрит вверх
-                        else:
-                            line += "→"  # смотрит вправо
+                        line += player_arrow(player.angle)
                     elif maze[y][x] == WALL_SYMBOL:
                         line += "#"
                     elif maze[y][x] == EXIT_SYMBOL:
@@ -273,4 +540,16 @@ class RayCaster:
                     line += " "
             minimap += line + "\n"
         
-        return minimap
\ No newline at end of file
+        return minimap
+    
+    def minimap_levels(self, maze, size=10):
+        """Сколько масштабов мини-карты доступно для лабиринта"""
+        minimap = self._get_minimap(maze)
+        return minimap.level_count(size) if minimap is not None else 1
+    
+    def _get_minimap(self, maze):
+        """Мини-карта с заранее отрисованными строками (один раз на лабиринт)"""
+        if maze is not self._minimap_maze:
+            self._minimap_maze = maze
+            self._minimap = Minimap(maze) if isinstance(maze, (MazeGrid, list)) else None
+        return self._minimap
@@ -0,0 +1,81 @@
+# raycasting_numpy.py - пакетный DDA для всех лучей кадра сразу (опциональный бэкенд)
+import numpy as np
+from config import *
+
+
+def grid_array(grid):
+    """Плоский массив кодов клеток поверх MazeGrid без копирования"""
+    return np.frombuffer(grid.cells, dtype=np.uint8)
+
+
+def cast_rays(cells, width, height, start_x, start_y, ray_dir_x, ray_dir_y, max_distance):
+    """Бросает все лучи вместе; повторяет RayCaster._cast_ray операция в операцию.
+
+    cells - плоский массив кодов клеток (height * width), ray_dir_x/ray_dir_y -
+    направления лучей (списки или массивы). Каждый шаг цикла продвигает все
+    еще летящие лучи на одну клетку; попавшие в стену, выход или край карты
+    выбывают.
+    Возвращает массивы (расстояние, сторона, попадание в выход).
+    """
+    ray_dir_x = np.asarray(ray_dir_x, dtype=np.float64)
+    ray_dir_y = np.asarray(ray_dir_y, dtype=np.float64)
+    count = len(ray_dir_x)
+    distances = np.full(count, float(max_distance))
+    sides = np.zeros(count, dtype=np.int8)
+    exits = np.zeros(count, dtype=bool)
+
+    map_x, map_y = int(start_x), int(start_y)
+    # Деление на ноль дает inf, а 0 * inf - nan, как и в поштучной версии
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta_x = np.where(ray_dir_x != 0, np.abs(1 / ray_dir_x), np.inf)
+        delta_y = np.where(ray_dir_y != 0, np.abs(1 / ray_dir_y), np.inf)
+        step_x = np.where(ray_dir_x < 0, -1, 1)
+        step_y = np.where(ray_dir_y < 0, -1, 1)
+        side_x = np.where(ray_dir_x < 0, (start_x - map_x) * delta_x,
+                          (map_x + 1.0 - start_x) * delta_x)
+        side_y = np.where(ray_dir_y < 0, (start_y - map_y) * delta_y,
+                          (map_y + 1.0 - start_y) * delta_y)
+
+    # Состояние летящих лучей; active - их номера в выходных массивах
+    active = np.arange(count)
+    map_xs = np.full(count, map_x)
+    map_ys = np.full(count, map_y)
+
+    while active.size:
+        # Шаг DDA: по x, если до x-линии ближе, иначе по y
+        along_x = side_x < side_y
+        side_x = np.where(along_x, side_x + delta_x, side_x)
+        side_y = np.where(along_x, side_y, side_y + delta_y)
+        map_xs = np.where(along_x, map_xs + step_x, map_xs)
+        map_ys = np.where(along_x, map_ys, map_ys + step_y)
+
+        outside = (map_xs < 0) | (map_xs >= width) | (map_ys < 0) | (map_ys >= height)
+        cell = cells[np.where(outside, 0, map_ys * width + map_xs)]
+        hit_exit = ~outside & (cell == CELL_EXIT)
+        hit = hit_exit | (~outside & (cell == CELL_WALL))
+        finished = hit | outside
+        if not finished.any():
+            continue
+
+        # Расстояние до стены по той же формуле, что и в _cast_ray
+        with np.errstate(divide='ignore', invalid='ignore'):
+            distance = np.abs(np.where(along_x,
+                                       (map_xs - start_x + (1 - step_x) / 2) / ray_dir_x,
+                                       (map_ys - start_y + (1 - step_y) / 2) / ray_dir_y))
+        distance = np.where(outside, float(max_distance), distance)
+
+        done = active[finished]
+        distances[done] = np.minimum(distance[finished], max_distance)
+        sides[done] = np.where(along_x[finished], 0, 1)
+        exits[done] = hit_exit[finished]
+
+        # Оставляем только летящие лучи
+        flying = ~finished
+        active = active[flying]
+        ray_dir_x, ray_dir_y = ray_dir_x[flying], ray_dir_y[flying]
+        delta_x, delta_y = delta_x[flying], delta_y[flying]
+        step_x, step_y = step_x[flying], step_y[flying]
+        side_x, side_y = side_x[flying], side_y[flying]
+        map_xs, map_ys = map_xs[flying], map_ys[flying]
+
+    return distances, sides, exits
@@ -0,0 +1,54 @@
+# render_quality.py - подстройка детализации рендера под бюджет времени кадра
+from collections import deque
+from config import *
+
+
+class QualityController:
+    """Выбирает уровень детализации по времени последних кадров.
+
+    Уровень level = 0 .. max_stride: на уровнях до max_stride - 1 бросается
+    каждый stride = level + 1 луч, а промежуточные колонки получают
+    расстояния интерполяцией. Последний уровень (widen) - тот же шаг
+    max_stride, но колонка брошенного луча просто растягивается до
+    следующего: так пропадает и работа на каждую колонку.
+
+    Если среднее время окна кадров больше бюджета, уровень растет; если и
+    на уровень ниже кадр (по оценке) уложится в бюджет с запасом, уровень
+    снижается. После каждого изменения окно набирается заново, чтобы не
+    раскачиваться.
+    """
+
+    def __init__(self, budget_ms=RENDER_BUDGET_MS, max_stride=MAX_RAY_STRIDE,
+                 window=RENDER_BUDGET_WINDOW):
+        self.budget = budget_ms / 1000
+        self.max_stride = max_stride
+        self.level = 0
+        self.times = deque(maxlen=window)
+
+    @property
+    def stride(self):
+        """Бросается каждый stride-й луч"""
+        return min(self.level + 1, self.max_stride)
+
+    @property
+    def widen(self):
+        """Растягивать колонки вместо интерполяции"""
+        return self.level >= self.max_stride
+
+    def record(self, elapsed):
+        """Учитывает время очередного кадра в секундах"""
+        self.times.append(elapsed)
+        if len(self.times) < self.times.maxlen:
+            return
+        average = sum(self.times) / len(self.times)
+        if average > self.budget and self.level < self.max_stride:
+            self.level += 1
+            self.times.clear()
+        elif self.level and average * (self.level + 1) / self.level < self.budget * 0.8:
+            # Время кадра растет не быстрее числа лучей - оценка с запасом
+            self.level -= 1
+            self.times.clear()
+
+    def average_ms(self):
+        """Среднее время кадра в окне (мс) или None, пока окно пустое"""
+        return sum(self.times) / len(self.times) * 1000 if self.times else None
@@ -0,0 +1,149 @@
+# terminal_presenter.py - вывод кадров с перерисовкой только изменившихся участков
+import os
+import sys
+from config import *
+
+ESC = "\x1b["
+# Разрыв между изменениями, который дешевле перерисовать, чем перепрыгнуть
+# курсором (ESC[строка;колонкаH - это 6-9 байт)
+MERGE_GAP = 8
+
+
+def enable_vt_mode(stream):
+    """Включает обработку ANSI-последовательностей в консоли; False - если нельзя"""
+    try:
+        if not stream.isatty():
+            return False
+    except (AttributeError, ValueError):
+        return False
+    if os.name != 'nt':
+        return True
+
+    # Консоль Windows 10+ понимает VT-последовательности после
+    # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    try:
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = wintypes.DWORD()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except (AttributeError, OSError):
+        return False
+
+
+def changed_runs(old, new):
+    """Отрезки (начало, конец) строки new, отличающиеся от old; близкие отрезки сливаются"""
+    runs = []
+    length = min(len(old), len(new))
+    col = 0
+    while col < length:
+        if old[col] == new[col]:
+            col += 1
+            continue
+        start = col
+        end = col + 1
+        col += 1
+        while col < length:
+            if old[col] != new[col]:
+                end = col + 1
+            elif col - end >= MERGE_GAP:
+                break
+            col += 1
+        runs.append((start, end))
+    if len(new) > length:
+        # Хвост новой строки длиннее старой - дописываем целиком
+        if runs and length - runs[-1][1] < MERGE_GAP:
+            runs[-1] = (runs[-1][0], len(new))
+        else:
+            runs.append((length, len(new)))
+    return runs
+
+
+class TerminalPresenter:
+    """Показывает экраны целиком, отправляя в терминал только отличия от прошлого.
+
+    Прошлый экран хранится построчно. Для каждой изменившейся строки
+    выводятся только измененные отрезки с переходом курсора
+    ESC[строка;колонкаH, укоротившиеся строки дочищаются ESC[K. Весь
+    вывод кадра уходит одним write(). Без поддержки VT (вывод не в
+    терминал или старая консоль Windows) экран очищается и печатается
+    целиком - тоже одной записью.
+
+    Абсолютные координаты верны, только пока экран помещается в окно:
+    иначе терминал прижимает строки ниже края к последней. Поэтому экран
+    обрезается по размеру окна (нижняя строка окна остается под курсор),
+    а после изменения размера окна кадр рисуется заново.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.vt = enable_vt_mode(self.stream)
+        self.previous = None
+        self.size = None  # (колонки, строки) окна, по которому обрезан прошлый кадр
+        # Байт, отправленных последним кадром (для отладки и замеров)
+        self.last_output_size = 0
+
+    def reset(self):
+        """Забывает прошлый экран: следующий кадр будет нарисован заново"""
+        self.previous = None
+
+    def terminal_size(self):
+        """Размер окна терминала (колонки, строки) или None, если его не узнать"""
+        try:
+            size = os.get_terminal_size(self.stream.fileno())
+        except (AttributeError, ValueError, OSError):
+            return None
+        return size.columns, size.lines
+
+    def present(self, text):
+        """Выводит экран text (строки через \\n)"""
+        lines = text.split("\n")
+        if not self.vt:
+            clear()
+            output = text + "\n"
+        else:
+            size = self.terminal_size()
+            if size != self.size:
+                # Окно изменило размер и терминал переразложил экран
+                self.size = size
+                self.previous = None
+            if size is not None:
+                columns, rows = size
+                lines = [line[:columns] for line in lines[:max(rows - 1, 1)]]
+            if self.previous is None:
+                # Первый кадр: прячем курсор, чистим экран и рисуем все
+                output = f"{ESC}?25l{ESC}2J{ESC}H" + "\n".join(lines)
+            else:
+                output = self._diff(self.previous, lines)
+        self.previous = lines
+
+        if output:
+            self.stream.write(output)
+            self.stream.flush()
+        self.last_output_size = len(output)
+
+    def _diff(self, previous, lines):
+        parts = []
+        for row, line in enumerate(lines):
+            old = previous[row] if row < len(previous) else ""
+            if line == old:
+                continue
+            for start, end in changed_runs(old, line):
+                parts.append(f"{ESC}{row + 1};{start + 1}H{line[start:end]}")
+            if len(line) < len(old):
+                parts.append(f"{ESC}{row + 1};{len(line) + 1}H{ESC}K")
+        # Строки, которых в новом экране нет, стираем
+        for row in range(len(lines), len(previous)):
+            if previous[row]:
+                parts.append(f"{ESC}{row + 1};1H{ESC}K")
+        return "".join(parts)
+
+    def close(self):
+        """Возвращает курсор под последний кадр и показывает его"""
+        if self.vt and self.previous is not None:
+            self.stream.write(f"{ESC}{len(self.previous) + 1};1H{ESC}?25h")
+            self.stream.flush()
+        self.previous = None
@@ -0,0 +1,56 @@
+# wall_distance.py - поле расстояний до ближайшей стены для пропуска пустоты лучами
+from config import *
+from maze_grid import MazeGrid
+
+# Больше в байт не помещается; таких больших пустот в лабиринтах не бывает
+MAX_WALL_DISTANCE = 255
+
+
+def build_wall_distance(grid):
+    """Чебышёвское расстояние от каждой клетки до ближайшего препятствия.
+
+    Препятствия - стены, выход и все, что за краем карты; у них 0. Если у
+    клетки значение k, то все клетки квадрата со стороной 2k - 1 вокруг нее
+    свободны. Возвращает bytearray в раскладке grid.cells.
+
+    Поле считается эрозией свободной области квадратом 3x3: после k
+    эрозий остаются клетки с расстоянием больше k. Каждая строка хранится
+    как одно большое целое, где на клетку приходится байт со значением
+    0 или 1, поэтому эрозия строки - это & со сдвигами на байт, а сумма
+    уровней копится сложением целых без переносов между байтами.
+    """
+    if not isinstance(grid, MazeGrid):
+        grid = MazeGrid.from_rows(grid)
+    width, height = grid.width, grid.height
+    if not width or not height:
+        return bytearray()
+
+    # Байт 1 для свободных клеток, 0 для стен и выхода
+    free = bytes(range(256)).maketrans(bytes([CELL_EMPTY, CELL_START, CELL_WALL, CELL_EXIT]),
+                                       bytes([1, 1, 0, 0]))
+    cells = bytes(grid.cells)
+    level = [int.from_bytes(cells[y * width:(y + 1) * width].translate(free), 'big')
+             for y in range(height)]
+    field = list(level)
+    row_mask = int.from_bytes(b'\x01' * width, 'big')
+
+    for _ in range(MAX_WALL_DISTANCE - 1):
+        # По горизонтали: клетка остается, если свободны оба соседа в строке
+        # (за краем строки - препятствие, сдвиг вносит туда 0)
+        across = [row & (row << 8) & (row >> 8) & row_mask for row in level]
+        # По вертикали: то же для соседних строк; первая и последняя строки
+        # граничат с краем карты и пропадают сразу
+        level = [0] + [across[y - 1] & across[y] & across[y + 1]
+                       for y in range(1, height - 1)] + [0]
+        if height == 1:
+            level = [0]
+        if not any(level):
+            break
+        for y, row in enumerate(level):
+            if row:
+                field[y] += row
+
+    result = bytearray()
+    for row in field:
+        result += row.to_bytes(width, 'big')
+    return result